@@ -0,0 +1,256 @@
+import time
+from dataclasses import dataclass
+import numpy as np
+from agent import Agent
+from task import Task
+from cost_matrix import CostMatrix
+
+# Engines that improve a solution step by step and can stop at a deadline;
+# the others (fuzzy, hungarian) run to completion once started
+ITERATIVE_ENGINES = {'ga', 'pso', 'island'}
+ONE_SHOT_ENGINES = ('fuzzy', 'hungarian')
+# Engines (and the greedy fallback) that only score the sparse candidate
+# pairs when the cost has them; the others always see the full matrix
+SPARSE_ENGINES = {'fuzzy', 'hungarian', 'greedy'}
+CALIBRATION_SIZE = 100  # Agents and tasks in the calibration problem
+# Island processes take tens of milliseconds to start, so shorter budgets run
+# the island's algorithm in-process instead, and longer ones stop the
+# islands ISLAND_MARGIN early to leave time for them to report back
+ISLAND_MIN_BUDGET = 0.1
+ISLAND_MARGIN = 0.01
+
+# Runtime model used to skip one-shot solves that would overrun the deadline.
+# Work is counted in scored agent-task pairs, times sqrt(min(n, m)) for the
+# Hungarian method (its runtime grew as n^2.5 from 100 to 2000 agents). Per
+# engine and power-of-two size class the model keeps the seconds per unit of
+# work of the latest run, set by calibrate() or by any solve, rather than the
+# fastest one. A size class never measured is extrapolated from the slowest
+# class seen, with a wider margin. A cold engine (no estimate yet, and
+# possibly lazy imports to pay for) never starts under a deadline.
+RUNTIME_MARGIN = 1.3  # Headroom on estimates from the same size class
+EXTRAPOLATION_MARGIN = 2.0  # ... from other size classes
+_rates = {}  # (mode, size class) -> seconds per unit of work
+
+
+# Outcome of a deadline-bounded solve. `score` is the assignment's score under
+# `objective`, the score the engine that ran actually maximizes ('ga' for GA
+# and GA islands, 'fuzzy' for fuzzy, 'pso' for the rest), `bound` an upper
+# bound on the best achievable score under it and `gap` = (bound - score) / |bound|.
+@dataclass
+class AnytimeResult:
+    assignment: dict
+    score: float
+    bound: float
+    gap: float
+    seconds: float
+    timed_out: bool
+    source: str  # engine mode, or 'greedy' when the deadline passed before the engine could run
+    objective: str = 'pso'
+
+
+# Anytime solve for any engine in simulation.ENGINES. Give either `budget`
+# (seconds from now) or an absolute `deadline` (time.perf_counter() value).
+# A greedy assignment is computed first: iterative engines start from it
+# (unless the deadline has passed by then) and return their best-so-far
+# before the deadline; one-shot engines are only started
+# once calibrate() has measured them and only if they fit in the time left;
+# otherwise the greedy assignment is returned.
+# Island mode with less than ISLAND_MIN_BUDGET left runs its algorithm
+# in-process (`source` tells which engine actually ran).
+def solve_anytime(mode, agents, tasks, cost=None, budget=None, deadline=None, **options):
+    from simulation import get_engine
+
+    start = time.perf_counter()
+    if deadline is None and budget is not None:
+        deadline = start + budget
+    cost = cost if cost is not None else CostMatrix(agents, tasks)
+    engine_deadline = deadline
+    if mode == 'island' and deadline is not None:
+        if deadline - start < ISLAND_MIN_BUDGET:
+            mode = options.get('algorithm', 'ga')
+            options = {key: value for key, value in options.items() if key == 'seed'}
+        else:
+            engine_deadline = deadline - ISLAND_MARGIN
+    engine = get_engine(mode)
+
+    if mode in ITERATIVE_ENGINES:
+        # Seed with a greedy solution of the engine's own objective
+        algorithm = options.get('algorithm', 'ga') if mode == 'island' else mode
+        rows, cols = greedy_assignment(cost, cost.ga_score if algorithm == 'ga' else None)
+        if deadline is not None and time.perf_counter() >= engine_deadline:
+            # Building the matrices and the seed used up the time; the seed
+            # is judged on the objective (and candidate pairs) it was built from
+            result, source = _to_assignment(agents, tasks, rows, cols), 'greedy'
+            objective, sparse = algorithm, cost.sparse and algorithm != 'ga'
+        else:
+            initial = _permutation(rows, cols, *cost.shape)
+            result, source = engine(agents, tasks, cost, deadline=engine_deadline, initial=initial, **options), mode
+    elif _fits(mode, cost, deadline):
+        engine_start = time.perf_counter()
+        result, source = engine(agents, tasks, cost, **options), mode
+        _observe(mode, cost, time.perf_counter() - engine_start)
+    else:
+        rows, cols = greedy_assignment(cost)
+        result, source = _to_assignment(agents, tasks, rows, cols), 'greedy'
+
+    end = time.perf_counter()
+    timed_out = deadline is not None and end > deadline
+    cost.stats['deadline_misses'] = int(timed_out)
+    if source != 'greedy' or mode not in ITERATIVE_ENGINES:
+        objective, sparse = _objective(source, options), cost.sparse and source in SPARSE_ENGINES
+    score = assignment_score(cost, result, objective)
+    bound = upper_bound(cost, objective, sparse)
+    gap = (bound - score) / abs(bound) if bound else 0.0
+    return AnytimeResult(result, score, bound, gap, end - start, timed_out, source, objective)
+
+
+def _objective(source, options):
+    if source == 'island':
+        return options.get('algorithm', 'ga')
+    return source if source in ('ga', 'fuzzy') else 'pso'
+
+
+def _work(mode, cost):
+    n, m = cost.shape
+    pairs = n * (cost.k if cost.sparse else m)
+    return max(1.0, pairs * np.sqrt(min(n, m)) if mode == 'hungarian' else pairs)
+
+
+def _size_class(work):
+    return int(np.log2(work))
+
+
+def _observe(mode, cost, seconds):
+    work = _work(mode, cost)
+    _rates[(mode, _size_class(work))] = float(seconds / work)
+
+
+def _estimate(mode, cost):
+    work = _work(mode, cost)
+    rate = _rates.get((mode, _size_class(work)))
+    if rate is not None:
+        return rate * work * RUNTIME_MARGIN
+    rates = [rate for (measured, _), rate in _rates.items() if measured == mode]
+    return max(rates) * work * EXTRAPOLATION_MARGIN if rates else None
+
+
+def _fits(mode, cost, deadline):
+    if deadline is None:
+        return True
+    remaining = deadline - time.perf_counter()
+    estimate = _estimate(mode, cost)
+    return remaining > 0 and estimate is not None and estimate <= remaining
+
+
+# Times each one-shot engine on a seeded size x size problem, outside any
+# deadline: the first run pays for lazy imports, the second sets the runtime
+# estimate of its size class. Simulation calls it once when solves have a budget.
+def calibrate(modes=ONE_SHOT_ENGINES, size=CALIBRATION_SIZE, seed=0):
+    from simulation import get_engine
+
+    rng = np.random.default_rng(seed)
+    agents = [Agent(i, 'Calibration', *rng.integers(0, size, 2).tolist(), health=int(rng.integers(50, 100)),
+                    speed=int(rng.integers(1, 5))) for i in range(size)]
+    tasks = [Task(i, 'Calibration', *rng.integers(0, size, 2).tolist(), urgency=int(rng.integers(5, 10)))
+             for i in range(size)]
+    for mode in modes:
+        engine = get_engine(mode)
+        engine(agents, tasks, CostMatrix(agents, tasks))
+        cost = CostMatrix(agents, tasks)
+        start = time.perf_counter()
+        engine(agents, tasks, cost)
+        _observe(mode, cost, time.perf_counter() - start)
+    return dict(_rates)
+
+
+# === Greedy Seed ===
+# Agents in order of their best score each take their best remaining task.
+# Uses the sparse candidates when the cost has them, otherwise a dense score
+# matrix (`score`, default the PSO score). Returns (rows, cols) index arrays.
+def greedy_assignment(cost, score=None):
+    n, m = cost.shape
+    if n == 0 or m == 0:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    if score is None and cost.sparse:
+        return _greedy_pairs(cost, *cost.candidates, cost.candidate_pso_score)
+
+    score = cost.pso_score if score is None else score
+    available = np.ones(m, dtype=bool)
+    rows, cols = [], []
+    for i in np.argsort(-score.max(axis=1), kind='stable'):
+        j = int(np.argmax(np.where(available, score[i], -np.inf)))
+        available[j] = False
+        rows.append(i)
+        cols.append(j)
+        if len(cols) == m:
+            break
+    return np.array(rows, dtype=int), np.array(cols, dtype=int)
+
+
+def _greedy_pairs(cost, rows, cols, score):
+    n, m = cost.shape
+    agent_free = np.ones(n, dtype=bool)
+    task_free = np.ones(m, dtype=bool)
+    chosen = []
+    for p in np.argsort(-score, kind='stable'):
+        i, j = rows[p], cols[p]
+        if agent_free[i] and task_free[j]:
+            agent_free[i] = task_free[j] = False
+            chosen.append(p)
+    chosen = np.array(chosen, dtype=int)
+    return rows[chosen], cols[chosen]
+
+
+# Full permutation of range(max(n, m)) for the GA/PSO encodings: assigned
+# agents take their task, everyone else gets the remaining (dummy) slots
+def _permutation(rows, cols, n, m):
+    size = max(n, m)
+    perm = np.full(size, -1)
+    perm[rows] = cols
+    used = np.zeros(size, dtype=bool)
+    used[cols] = True
+    perm[perm < 0] = np.flatnonzero(~used)
+    return perm
+
+
+def _to_assignment(agents, tasks, rows, cols):
+    result = {agent.id: None for agent in agents}
+    for i, j in zip(rows, cols):
+        result[agents[int(i)].id] = tasks[int(j)].id
+    return result
+
+
+# === Quality ===
+# Total score of an assignment under one objective; the default PSO score is
+# the shared yardstick used to compare engines (benchmark.py, scenario.py)
+def assignment_score(cost, assignment, objective='pso'):
+    agent_index = {aid: i for i, aid in enumerate(cost.agent_ids)}
+    task_index = {tid: j for j, tid in enumerate(cost.task_ids)}
+    pairs = [(agent_index[aid], task_index[tid]) for aid, tid in assignment.items()
+             if aid in agent_index and tid in task_index]
+    if not pairs:
+        return 0.0
+    rows, cols = np.array(pairs).T
+    return float(cost.pair_score(objective, rows, cols).sum())
+
+
+# No assignment can beat the sum of the best min(n, m) agent (or task) maxima
+# under `objective`, counting idle agents as 0. With `sparse` (default: when
+# the cost has candidates) the bound is over the candidate pairs only.
+def upper_bound(cost, objective='pso', sparse=None):
+    n, m = cost.shape
+    k = min(n, m)
+    if k == 0:
+        return 0.0
+    if sparse if sparse is not None else cost.sparse:
+        rows, cols = cost.candidates
+        score = getattr(cost, f'candidate_{objective}_score')
+        row_best = np.full(n, -np.inf)
+        col_best = np.full(m, -np.inf)
+        np.maximum.at(row_best, rows, score)
+        np.maximum.at(col_best, cols, score)
+    else:
+        score = getattr(cost, f'{objective}_score')
+        row_best, col_best = score.max(axis=1), score.max(axis=0)
+    bounds = [np.sort(np.maximum(best, 0))[::-1][:k].sum() for best in (row_best, col_best)]
+    return float(min(bounds))
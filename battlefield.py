@@ -1,13 +1,205 @@
+import numpy as np
+from spatial_index import GridIndex, FreeCellPool
+
+CHUNK_SIZE = 32  # Cells per side of one storage tile
+ALLOCATE_TRIES = 64  # Random draws before allocate() falls back to a scan
+AGENT_BUCKET_SIZE = 16  # Coarser than the task index so fewer agent moves change bucket
+
+
+# Integer grid stored as CHUNK_SIZE x CHUNK_SIZE tiles that are only
+# allocated while they hold a non-zero cell, so memory follows the populated
+# area rather than the map size (a 10k x 10k map is ~98k potential 4 KB tiles).
+# Live tiles share one (slots, size, size) array and `_slots` maps each tile
+# key (cy * columns + cx) to its slot, so a batched update indexes every
+# touched tile in one operation. Emptied slots are reused.
+class ChunkedLayer:
+    def __init__(self, width, height, dtype=np.int32, chunk_size=CHUNK_SIZE):
+        self.width = width
+        self.height = height
+        self.dtype = dtype
+        self.chunk_size = chunk_size
+        self.columns = -(-width // chunk_size)
+        self._slots = np.full(self.columns * -(-height // chunk_size), -1, dtype=np.int64)  # tile key -> slot
+        self._tiles = np.zeros((0, chunk_size, chunk_size), dtype=dtype)  # slot -> tile indexed [y, x]
+        self._keys = np.zeros(0, dtype=np.int64)  # slot -> tile key
+        self._counts = np.zeros(0, dtype=np.int64)  # slot -> number of non-zero cells
+        self._free = []  # released slots
+        self._used = 0  # slots handed out so far
+
+    def _locate(self, x, y):
+        size = self.chunk_size
+        return (y // size) * self.columns + x // size, (y % size) * size + x % size
+
+    def _acquire(self, keys):
+        reused = [self._free.pop() for _ in range(min(len(keys), len(self._free)))]
+        fresh = len(keys) - len(reused)
+        if self._used + fresh > len(self._tiles):
+            capacity = max(2 * len(self._tiles), self._used + fresh, 4)
+            size = self.chunk_size
+            tiles = np.zeros((capacity, size, size), dtype=self.dtype)
+            tiles[:len(self._tiles)] = self._tiles
+            self._tiles = tiles
+            self._keys = np.resize(self._keys, capacity)
+            self._counts = np.concatenate([self._counts, np.zeros(capacity - len(self._counts), dtype=np.int64)])
+        slots = np.array(reused + list(range(self._used, self._used + fresh)), dtype=np.int64)
+        self._used += fresh
+        self._slots[keys] = slots
+        self._keys[slots] = keys
+        return slots
+
+    def _release(self, slots):
+        # Tiles are all zero by the time their count drops to 0
+        self._slots[self._keys[slots]] = -1
+        self._free.extend(slots.tolist())
+
+    def __getitem__(self, cell):
+        key, local = self._locate(*cell)
+        slot = self._slots[key]
+        return 0 if slot < 0 else self._tiles[slot].flat[local].item()
+
+    def __setitem__(self, cell, value):
+        key, local = self._locate(*cell)
+        slot = self._slots[key]
+        if slot < 0:
+            if not value:
+                return
+            slot = self._acquire(np.array([key]))[0]
+        tile = self._tiles[slot].reshape(-1)
+        self._counts[slot] += bool(value) - bool(tile[local])
+        tile[local] = value
+        if not self._counts[slot]:
+            self._release(np.array([slot]))
+
+    # Batched `layer[x, y] += delta` over coordinate arrays (repeats add up;
+    # `delta` is a scalar or one value per cell)
+    def add_at(self, xs, ys, delta):
+        if not len(xs):
+            return
+        keys, local = self._locate(xs, ys)
+        slots = self._slots[keys]
+        missing = slots < 0
+        if missing.any():
+            self._acquire(np.flatnonzero(np.bincount(keys[missing], minlength=len(self._slots))))
+            slots = self._slots[keys]
+        delta = np.broadcast_to(delta, xs.shape).astype(self.dtype)
+        np.add.at(self._tiles.reshape(-1), slots * self.chunk_size ** 2 + local, delta)
+        # Recount only the touched tiles
+        touched = np.flatnonzero(np.bincount(slots, minlength=len(self._tiles)))
+        self._counts[touched] = np.count_nonzero(self._tiles[touched].reshape(len(touched), -1), axis=1)
+        self._release(touched[self._counts[touched] == 0])
+
+    @property
+    def nbytes(self):
+        return self._tiles.nbytes + self._slots.nbytes
+
+    # Dense copy of the cells [x0, x1) x [y0, y1), e.g. the visible viewport
+    def window(self, x0, y0, x1, y1):
+        x0, y0 = max(0, x0), max(0, y0)
+        x1, y1 = min(self.width, x1), min(self.height, y1)
+        out = np.zeros((max(0, y1 - y0), max(0, x1 - x0)), dtype=self.dtype)
+        size = self.chunk_size
+        for cy in range(y0 // size, (y1 - 1) // size + 1):
+            for cx in range(x0 // size, (x1 - 1) // size + 1):
+                slot = self._slots[cy * self.columns + cx]
+                if slot < 0:
+                    continue
+                ax, ay = max(x0, cx * size), max(y0, cy * size)
+                bx, by = min(x1, (cx + 1) * size), min(y1, (cy + 1) * size)
+                out[ay - y0:by - y0, ax - x0:bx - x0] = self._tiles[slot, ay - cy * size:by - cy * size,
+                                                                    ax - cx * size:bx - cx * size]
+        return out
+
+
+# Occupancy of the map. Tasks hold their cell exclusively (task layer stores
+# the task id); agents may share cells while moving (agent layer stores how
+# many are on each cell). A cell is free for spawning when both are empty.
+# The free-cell pool only tracks task cells, so agent moves never touch it;
+# allocate() skips pool cells an agent is standing on.
 class Battlefield:
     def __init__(self, width=10, height=10):
         self.width = width
         self.height = height
-        self.grid = [['.' for _ in range(width)] for _ in range(height)]
+        self.tasks = ChunkedLayer(width, height)
+        self.agents = ChunkedLayer(width, height)
+        # Spatial lookups: which agent/task is where, and which cells are free
+        self.agent_index = GridIndex(width, height, AGENT_BUCKET_SIZE)
+        self.task_index = GridIndex(width, height)
+        self.free_cells = FreeCellPool(width, height)
+
+    @staticmethod
+    def _is_agent(entity):
+        return hasattr(entity, 'health')
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def is_free(self, x, y):
+        return not self.tasks[x, y] and not self.agents[x, y]
+
+    def allocate(self, rng):
+        for _ in range(ALLOCATE_TRIES):
+            x, y = self.free_cells.sample(rng)
+            if not self.agents[x, y]:
+                return x, y
+        # Nearly every task-free cell holds an agent
+        for x, y in self.free_cells.cells():
+            if not self.agents[x, y]:
+                return x, y
+        raise ValueError("No free cells left on the battlefield")
+
+    # === Occupancy Updates ===
+    def place(self, entity):
+        x, y = entity.x, entity.y
+        if not self.in_bounds(x, y):
+            raise ValueError(f"Position ({x}, {y}) is outside the battlefield")
+        if self._is_agent(entity):
+            self.agents[x, y] += 1
+            self.agent_index.insert(entity.id, x, y)
+        else:
+            if self.tasks[x, y]:
+                raise ValueError(f"Cell ({x}, {y}) already holds task {self.tasks[x, y]}")
+            self.tasks[x, y] = entity.id
+            self.task_index.insert(entity.id, x, y)
+            self.free_cells.reserve(x, y)
+
+    def remove(self, entity):
+        if self._is_agent(entity):
+            x, y = self.agent_index.position(entity.id)
+            self.agents[x, y] -= 1
+            self.agent_index.remove(entity.id)
+        else:
+            x, y = self.task_index.position(entity.id)
+            self.tasks[x, y] = 0
+            self.task_index.remove(entity.id)
+            self.free_cells.release(x, y)
+
+    def move(self, entity, x, y):
+        if not self.in_bounds(x, y):
+            raise ValueError(f"Position ({x}, {y}) is outside the battlefield")
+        self.remove(entity)
+        entity.x, entity.y = x, y
+        self.place(entity)
+
+    # Batched agent moves: `ids` with their old and new coordinate arrays
+    def move_agents(self, ids, old_x, old_y, x, y):
+        if not len(ids):
+            return
+        if x.min() < 0 or y.min() < 0 or x.max() >= self.width or y.max() >= self.height:
+            raise ValueError("Agent moved outside the battlefield")
+        delta = np.repeat([-1, 1], len(ids))
+        self.agents.add_at(np.concatenate([old_x, x]), np.concatenate([old_y, y]), delta)
+        self.agent_index.move_many(ids, old_x, old_y, x, y)
 
     def place_entity(self, x, y, entity):
-        self.grid[y][x] = 'A' if hasattr(entity, 'health') else 'T'
+        entity.x, entity.y = x, y
+        self.place(entity)
 
-    def display(self):
-        print("Battlefield Grid:")
-        for row in self.grid:
+    # === Rendering ===
+    def display(self, x0=0, y0=0, width=40, height=20):
+        # Only the requested viewport is materialized
+        tasks = self.tasks.window(x0, y0, x0 + width, y0 + height)
+        agents = self.agents.window(x0, y0, x0 + width, y0 + height)
+        cells = np.where(agents > 0, 'A', np.where(tasks != 0, 'T', '.'))
+        print(f"Battlefield Grid ({self.width}x{self.height}, showing x={x0}.., y={y0}..):")
+        for row in cells:
             print(' '.join(row))
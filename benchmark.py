@@ -0,0 +1,179 @@
+import argparse
+import csv
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from agent import Agent
+from task import Task
+from world_state import AgentStore, TaskStore
+from cost_matrix import CostMatrix
+
+# === Settings ===
+DEFAULT_SIZES = [3, 10, 50, 200, 1000, 5000]
+DEFAULT_ENGINES = ['fuzzy', 'pso', 'ga', 'hungarian']
+# Largest scenario each engine is run on unless --no-limits is given
+ENGINE_LIMITS = {'fuzzy': 1000, 'pso': 5000, 'ga': 5000, 'hungarian': 5000, 'island': 5000}
+# Modules timed by --imports (each in a fresh interpreter)
+IMPORT_MODULES = ['simulation', 'benchmark', 'main', 'fuzzy_engine', 'pso_engine', 'ga_engine',
+                  'hungarian_engine', 'island_model', 'incremental', 'solver_service', 'metrics']
+FIELDS = ['engine', 'size', 'seed', 'status', 'wall_time_s', 'peak_mem_mb',
+          'total_score', 'assigned', 'valid', 'error']
+
+
+# === Scenario Generation ===
+# Same attribute ranges as the live simulation; the grid grows with the
+# scenario so density stays roughly constant.
+def make_scenario(size, seed):
+    rng = np.random.default_rng(seed)
+    side = max(10, int(np.ceil(np.sqrt(size * 4))))
+    cells = rng.choice(side * side, size=2 * size, replace=False)
+    xs, ys = cells % side, cells // side
+
+    agents, tasks = AgentStore(size), TaskStore(size)
+    health = rng.integers(50, 101, size)
+    stamina = rng.integers(50, 101, size)
+    speed = rng.integers(1, 6, size)
+    urgency = rng.integers(5, 11, size)
+    for i in range(size):
+        agents.add(Agent(i+1, 'Attacker', int(xs[i]), int(ys[i]), health=int(health[i]),
+                         stamina=int(stamina[i]), speed=int(speed[i])))
+        tasks.add(Task(i+1, 'Task', int(xs[size + i]), int(ys[size + i]), urgency=int(urgency[i])))
+    return agents, tasks
+
+
+# === Result Checks ===
+def check_assignment(result, agents, tasks):
+    task_ids = [tid for tid in result.values() if tid is not None]
+    return (all(aid in agents for aid in result)
+            and all(tid in tasks for tid in task_ids)
+            and len(task_ids) == len(set(task_ids)))
+
+
+def total_score(result, cost):
+    # Every engine is rated with the shared PSO/Hungarian score
+    agent_index = {aid: i for i, aid in enumerate(cost.agent_ids)}
+    task_index = {tid: j for j, tid in enumerate(cost.task_ids)}
+    pairs = [(agent_index[aid], task_index[tid]) for aid, tid in result.items()
+             if aid in agent_index and tid in task_index]
+    if not pairs:
+        return 0.0
+    rows, cols = zip(*pairs)
+    return float(cost.pso_score[list(rows), list(cols)].sum())
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# === Single Run (executed in a worker process) ===
+def run_case(engine, size, seed):
+    from simulation import get_engine
+
+    row = {'engine': engine, 'size': size, 'seed': seed, 'status': 'ok', 'wall_time_s': None,
+           'peak_mem_mb': None, 'total_score': None, 'assigned': None, 'valid': None, 'error': ''}
+    solve = get_engine(engine)
+    # Warm-up on a tiny scenario so lazy imports are not counted as solve time
+    solve(*make_scenario(2, seed))
+
+    agents, tasks = make_scenario(size, seed)
+    random.seed(seed)
+    np.random.seed(seed)
+
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    try:
+        cost = CostMatrix(agents, tasks)
+        result = solve(agents, tasks, cost)
+    except Exception as e:
+        row.update(status='error', error=f"{type(e).__name__}: {e}")
+        return row
+    row['wall_time_s'] = time.perf_counter() - start
+    row['peak_mem_mb'] = max(0.0, _peak_rss_mb() - baseline)
+
+    row['valid'] = check_assignment(result, agents, tasks)
+    row['assigned'] = sum(tid is not None for tid in result.values())
+    row['total_score'] = total_score(result, cost)
+    return row
+
+
+def run_benchmark(sizes=DEFAULT_SIZES, engines=DEFAULT_ENGINES, repeats=1, seed=0, workers=None, limits=True):
+    cases, results = [], []
+    for size in sizes:
+        for engine in engines:
+            for r in range(repeats):
+                case = (engine, size, seed + r)
+                if limits and size > ENGINE_LIMITS.get(engine, size):
+                    results.append(dict.fromkeys(FIELDS, None) | {
+                        'engine': engine, 'size': size, 'seed': seed + r, 'status': 'skipped', 'error': ''})
+                else:
+                    cases.append(case)
+
+    # One process per case so peak memory is measured from a clean baseline
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1) as pool:
+        results.extend(pool.map(run_case, *zip(*cases)) if cases else [])
+    return sorted(results, key=lambda row: (row['size'], row['engine'], row['seed']))
+
+
+# === Import-Time Benchmark ===
+def measure_import(module, repeats=5):
+    # Best of `repeats` cold imports; numpy and friends are counted too
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    times = [float(subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                  check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout)
+             for _ in range(repeats)]
+    return min(times)
+
+
+def run_import_benchmark(modules=IMPORT_MODULES, repeats=5):
+    return {module: measure_import(module, repeats) for module in modules}
+
+
+def write_report(results, path):
+    with open(f"{path}.csv", 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+    with open(f"{path}.json", 'w') as f:
+        json.dump(results, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the assignment engines on seeded scenarios.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--engines', nargs='+', default=DEFAULT_ENGINES, choices=DEFAULT_ENGINES + ['island'])
+    parser.add_argument('--repeats', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--no-limits', action='store_true', help="run every engine at every size")
+    parser.add_argument('--output', default='benchmark_results', help="report path without extension")
+    parser.add_argument('--imports', action='store_true', help="time cold imports of each module instead")
+    args = parser.parse_args(argv)
+
+    if args.imports:
+        print(f"{'module':<18} {'import (ms)':>11}")
+        for module, seconds in run_import_benchmark(repeats=max(args.repeats, 3)).items():
+            print(f"{module:<18} {1000 * seconds:>11.1f}")
+        return
+
+    results = run_benchmark(args.sizes, args.engines, args.repeats, args.seed, args.workers, not args.no_limits)
+    write_report(results, args.output)
+
+    print(f"{'engine':<10} {'size':>6} {'status':<8} {'time (s)':>9} {'mem (MB)':>9} {'score':>12} valid")
+    for row in results:
+        if row['status'] != 'ok':
+            print(f"{row['engine']:<10} {row['size']:>6} {row['status']:<8} {row['error']}")
+            continue
+        print(f"{row['engine']:<10} {row['size']:>6} {row['status']:<8} {row['wall_time_s']:>9.3f} "
+              f"{row['peak_mem_mb']:>9.1f} {row['total_score']:>12.1f} {row['valid']}")
+    print(f"Report written to {args.output}.csv and {args.output}.json")
+
+
+if __name__ == '__main__':
+    main()
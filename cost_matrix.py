@@ -0,0 +1,135 @@
+from functools import cached_property
+import numpy as np
+from world_state import EntityStore
+from spatial_index import k_nearest
+
+# Score weights (health, urgency, travel) used by each engine
+PSO_WEIGHTS = (0.3, 0.4, 0.3)
+GA_WEIGHTS = (0.5, 0.3, 0.2)
+CHART_PSO_WEIGHTS = (0.4, 0.4, 0.2)
+
+
+def _column(entities, field):
+    # Stores already hold their attributes as arrays
+    if isinstance(entities, EntityStore):
+        return entities.column(field).astype(float)
+    return np.array([getattr(e, field) for e in entities], dtype=float)
+
+
+# Agent/task attributes as NumPy arrays, with every N x M matrix built in one
+# broadcast. Matrices are computed on first access and then reused.
+# With `k` set, engines that support it only score each agent's k nearest
+# tasks (flat `candidates` arrays) instead of the full N x M matrix.
+class CostMatrix:
+    def __init__(self, agents, tasks, k=None):
+        self.agent_ids = [a.id for a in agents]
+        self.task_ids = [t.id for t in tasks]
+        self.agent_pos = np.column_stack([_column(agents, 'x'), _column(agents, 'y')]).reshape(-1, 2)
+        self.task_pos = np.column_stack([_column(tasks, 'x'), _column(tasks, 'y')]).reshape(-1, 2)
+        self.health = _column(agents, 'health')
+        self.speed = _column(agents, 'speed')
+        self.urgency = _column(tasks, 'urgency')
+        self.k = k
+        self.stats = {}  # Per-solve counters filled in by the engines (e.g. fitness_evaluations)
+
+    @property
+    def shape(self):
+        return len(self.agent_ids), len(self.task_ids)
+
+    # Per-axis N x M offsets; summing two 2-D arrays is much faster than
+    # reducing an N x M x 2 array over its last axis
+    @cached_property
+    def _delta(self):
+        return (np.subtract.outer(self.agent_pos[:, 0], self.task_pos[:, 0]),
+                np.subtract.outer(self.agent_pos[:, 1], self.task_pos[:, 1]))
+
+    @cached_property
+    def manhattan(self):
+        dx, dy = self._delta
+        return np.abs(dx) + np.abs(dy)
+
+    @cached_property
+    def euclidean(self):
+        dx, dy = self._delta
+        return np.sqrt(dx ** 2 + dy ** 2)
+
+    @cached_property
+    def time_to_reach(self):
+        return self.manhattan / np.maximum(self.speed, 0.1)[:, None]
+
+    def score(self, weights, travel):
+        w_health, w_urgency, w_travel = weights
+        return self.health[:, None] * w_health + self.urgency[None, :] * w_urgency - travel * w_travel
+
+    @cached_property
+    def pso_score(self):
+        return self.score(PSO_WEIGHTS, self.time_to_reach)
+
+    @cached_property
+    def ga_score(self):
+        return self.score(GA_WEIGHTS, self.manhattan)
+
+    def fuzzy(self, inference=None):
+        # Imported here because fuzzy_engine itself depends on this module
+        from fuzzy_engine import get_fuzzy_scores
+        return get_fuzzy_scores(self.health[:, None], self.euclidean / self.speed[:, None], self.urgency[None, :],
+                                inference)
+
+    @cached_property
+    def fuzzy_score(self):
+        return self.fuzzy()
+
+    # === Sparse Candidates (k nearest tasks per agent) ===
+    @property
+    def sparse(self):
+        return self.k is not None and self.k < len(self.task_ids)
+
+    @cached_property
+    def candidates(self):
+        return k_nearest(self.agent_pos, self.task_pos, self.k if self.sparse else len(self.task_ids))
+
+    @cached_property
+    def _candidate_delta(self):
+        rows, cols = self.candidates
+        return self.agent_pos[rows] - self.task_pos[cols]
+
+    def candidate_score(self, weights, travel):
+        w_health, w_urgency, w_travel = weights
+        rows, cols = self.candidates
+        return self.health[rows] * w_health + self.urgency[cols] * w_urgency - travel * w_travel
+
+    @cached_property
+    def candidate_pso_score(self):
+        rows, _ = self.candidates
+        travel = np.abs(self._candidate_delta).sum(axis=1) / np.maximum(self.speed, 0.1)[rows]
+        return self.candidate_score(PSO_WEIGHTS, travel)
+
+    @cached_property
+    def candidate_ga_score(self):
+        return self.candidate_score(GA_WEIGHTS, np.abs(self._candidate_delta).sum(axis=1))
+
+    # Score of arbitrary (agent, task) index pairs under one engine objective
+    # ('pso', 'ga' or 'fuzzy'), without the full matrix
+    def pair_score(self, objective, rows, cols):
+        delta = self.agent_pos[rows] - self.task_pos[cols]
+        if objective == 'fuzzy':
+            from fuzzy_engine import get_fuzzy_scores
+            dist = np.sqrt((delta ** 2).sum(axis=1))
+            return get_fuzzy_scores(self.health[rows], dist / self.speed[rows], self.urgency[cols])
+        manhattan = np.abs(delta).sum(axis=1)
+        if objective == 'ga':
+            weights, travel = GA_WEIGHTS, manhattan
+        else:
+            weights, travel = PSO_WEIGHTS, manhattan / np.maximum(self.speed, 0.1)[rows]
+        w_health, w_urgency, w_travel = weights
+        return self.health[rows] * w_health + self.urgency[cols] * w_urgency - travel * w_travel
+
+    def candidate_fuzzy(self, inference=None):
+        from fuzzy_engine import get_fuzzy_scores
+        rows, cols = self.candidates
+        dist = np.sqrt((self._candidate_delta ** 2).sum(axis=1))
+        return get_fuzzy_scores(self.health[rows], dist / self.speed[rows], self.urgency[cols], inference)
+
+    @cached_property
+    def candidate_fuzzy_score(self):
+        return self.candidate_fuzzy()
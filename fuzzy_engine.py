@@ -1,65 +1,299 @@
+import json
 import numpy as np
-import skfuzzy as fuzz
-from skfuzzy import control as ctrl
-
-health = ctrl.Antecedent(np.arange(0, 101, 1), 'health')
-distance = ctrl.Antecedent(np.arange(0, 10, 1), 'distance')
-urgency = ctrl.Antecedent(np.arange(0, 11, 1), 'urgency')
-assign = ctrl.Consequent(np.arange(0, 11, 1), 'assign')
-
-#Membership Function
-health.automf(3)
-distance.automf(3)
-urgency.automf(3)
-
-assign['low'] = fuzz.trimf(assign.universe, [0, 0, 5])
-assign['medium'] = fuzz.trimf(assign.universe, [2, 5, 8])
-assign['high'] = fuzz.trimf(assign.universe, [5, 10, 10])
-
-# Fuzzy rules
-# Valid labels with automf(3) are: 'poor', 'average', 'good'
-rules = [
-    ctrl.Rule(health['good'] & distance['poor'] & urgency['good'], assign['high']),
-    ctrl.Rule(health['good'] & distance['average'] & urgency['good'], assign['high']),
-    ctrl.Rule(health['good'] & distance['good'] & urgency['good'], assign['medium']),
-    ctrl.Rule(health['good'] & distance['poor'] & urgency['average'], assign['high']),
-    ctrl.Rule(health['good'] & distance['average'] & urgency['average'], assign['medium']),
-    ctrl.Rule(health['good'] & distance['good'] & urgency['average'], assign['medium']),
-    ctrl.Rule(health['good'] & distance['poor'] & urgency['poor'], assign['medium']),
-    ctrl.Rule(health['good'] & distance['average'] & urgency['poor'], assign['medium']),
-    ctrl.Rule(health['good'] & distance['good'] & urgency['poor'], assign['low']),
-    
-    ctrl.Rule(health['average'] & distance['poor'] & urgency['good'], assign['high']),
-    ctrl.Rule(health['average'] & distance['average'] & urgency['good'], assign['high']),
-    ctrl.Rule(health['average'] & distance['good'] & urgency['good'], assign['medium']),
-    ctrl.Rule(health['average'] & distance['poor'] & urgency['average'], assign['high']),
-    ctrl.Rule(health['average'] & distance['average'] & urgency['average'], assign['medium']),
-    ctrl.Rule(health['average'] & distance['good'] & urgency['average'], assign['medium']),
-    ctrl.Rule(health['average'] & distance['poor'] & urgency['poor'], assign['medium']),
-    ctrl.Rule(health['average'] & distance['average'] & urgency['poor'], assign['medium']),
-    ctrl.Rule(health['average'] & distance['good'] & urgency['poor'], assign['low']),
-    
-    ctrl.Rule(health['poor'] & distance['poor'] & urgency['good'], assign['medium']),
-    ctrl.Rule(health['poor'] & distance['average'] & urgency['good'], assign['medium']),
-    ctrl.Rule(health['poor'] & distance['good'] & urgency['good'], assign['low']),
-    ctrl.Rule(health['poor'] & distance['poor'] & urgency['average'], assign['medium']),
-    ctrl.Rule(health['poor'] & distance['average'] & urgency['average'], assign['low']),
-    ctrl.Rule(health['poor'] & distance['good'] & urgency['average'], assign['low']),
-    ctrl.Rule(health['poor'] & distance['poor'] & urgency['poor'], assign['low']),
-    ctrl.Rule(health['poor'] & distance['average'] & urgency['poor'], assign['low']),
-    ctrl.Rule(health['poor'] & distance['good'] & urgency['poor'], assign['low'])
-]
-
-
-
-# Control system
-assignment_ctrl = ctrl.ControlSystem(rules)
-task_simulator = ctrl.ControlSystemSimulation(assignment_ctrl)
+from cost_matrix import CostMatrix
+
+SCORE_CHUNK = 1 << 16  # Pairs scored per batch in FuzzyInference.score
+
+# === Rule Base (data) ===
+# Membership functions are triangles [a, b, c] over integer universes
+# [start, stop]. The input terms match skfuzzy's automf(3) on the same
+# universes. Each rule lists one term per input (in input order), then the
+# output term.
+DEFAULT_CONFIG = {
+    'inputs': {
+        'health': {'universe': [0, 100], 'terms': {'poor': [-50, 0, 50], 'average': [0, 50, 100],
+                                                   'good': [50, 100, 150]}},
+        'distance': {'universe': [0, 9], 'terms': {'poor': [-4.5, 0, 4.5], 'average': [0, 4.5, 9],
+                                                   'good': [4.5, 9, 13.5]}},
+        'urgency': {'universe': [0, 10], 'terms': {'poor': [-5, 0, 5], 'average': [0, 5, 10],
+                                                   'good': [5, 10, 15]}},
+    },
+    'output': {'name': 'assign', 'universe': [0, 10],
+               'terms': {'low': [0, 0, 5], 'medium': [2, 5, 8], 'high': [5, 10, 10]}},
+    'rules': [
+        # health, distance, urgency -> assign
+        ['good', 'poor', 'good', 'high'],
+        ['good', 'average', 'good', 'high'],
+        ['good', 'good', 'good', 'medium'],
+        ['good', 'poor', 'average', 'high'],
+        ['good', 'average', 'average', 'medium'],
+        ['good', 'good', 'average', 'medium'],
+        ['good', 'poor', 'poor', 'medium'],
+        ['good', 'average', 'poor', 'medium'],
+        ['good', 'good', 'poor', 'low'],
+
+        ['average', 'poor', 'good', 'high'],
+        ['average', 'average', 'good', 'high'],
+        ['average', 'good', 'good', 'medium'],
+        ['average', 'poor', 'average', 'high'],
+        ['average', 'average', 'average', 'medium'],
+        ['average', 'good', 'average', 'medium'],
+        ['average', 'poor', 'poor', 'medium'],
+        ['average', 'average', 'poor', 'medium'],
+        ['average', 'good', 'poor', 'low'],
+
+        ['poor', 'poor', 'good', 'medium'],
+        ['poor', 'average', 'good', 'medium'],
+        ['poor', 'good', 'good', 'low'],
+        ['poor', 'poor', 'average', 'medium'],
+        ['poor', 'average', 'average', 'low'],
+        ['poor', 'good', 'average', 'low'],
+        ['poor', 'poor', 'poor', 'low'],
+        ['poor', 'average', 'poor', 'low'],
+        ['poor', 'good', 'poor', 'low'],
+    ],
+}
+
+
+def _universe(bounds):
+    return np.arange(bounds[0], bounds[1] + 1, 1)
+
+
+def _trimf(x, abc):
+    # Same evaluation as skfuzzy.trimf, so memberships match bit for bit
+    a, b, c = abc
+    y = np.zeros(len(x))
+    if a != b:
+        idx = (a < x) & (x < b)
+        y[idx] = (x[idx] - a) / float(b - a)
+    if b != c:
+        idx = (b < x) & (x < c)
+        y[idx] = (c - x[idx]) / float(c - b)
+    y[x == b] = 1
+    return y
+
+
+# === Inference Object ===
+# Mamdani inference over whole arrays of inputs. It mirrors the pipeline of
+# skfuzzy's ControlSystemSimulation (clip to universe, fmin/fmax, upsampled
+# centroid), so scores match the reference simulator. Everything is compiled
+# into read-only arrays at construction and score() keeps no state between
+# calls, so one instance can be shared by any number of threads, and it
+# pickles as plain data for process pools.
+class FuzzyInference:
+    def __init__(self, config=DEFAULT_CONFIG):
+        self.config = config
+        inputs, output = config['inputs'], config['output']
+        self.input_names = list(inputs)
+        self.input_mfs = []
+        for name in self.input_names:
+            universe = _universe(inputs[name]['universe'])
+            terms = inputs[name]['terms']
+            self.input_mfs.append((universe, np.array([_trimf(universe, abc) for abc in terms.values()])))
+        self.universe = _universe(output['universe']).astype(float)
+        self.output_mfs = np.array([_trimf(self.universe, abc) for abc in output['terms'].values()])
+
+        term_index = [list(inputs[name]['terms']) for name in self.input_names]
+        output_terms = list(output['terms'])
+        self.antecedents = np.array([[terms.index(rule[i]) for i, terms in enumerate(term_index)]
+                                     for rule in config['rules']])
+        self.consequents = np.array([output_terms.index(rule[-1]) for rule in config['rules']])
+
+    @classmethod
+    def from_json(cls, path):
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def __call__(self, *values):
+        return float(self.score(*values))
+
+    def score(self, *values):
+        values = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in values))
+        flat = [v.ravel() for v in values]
+        scores = np.empty(flat[0].size)
+        # Work in chunks so large N x M problems keep bounded temporaries
+        for start in range(0, scores.size, SCORE_CHUNK):
+            chunk = slice(start, start + SCORE_CHUNK)
+            scores[chunk] = self._score_chunk(*(v[chunk] for v in flat))
+        return scores.reshape(values[0].shape)
+
+    def _score_chunk(self, *values):
+        # Fuzzify inputs: memberships[i] has shape (terms, n)
+        memberships = []
+        for (var_universe, mfs), v in zip(self.input_mfs, values):
+            v = np.clip(v, var_universe.min(), var_universe.max())
+            memberships.append(np.array([np.interp(v, var_universe, mf) for mf in mfs]))
+
+        # Rule activation (AND = fmin) and aggregation per output term (OR = fmax)
+        activation = memberships[0][self.antecedents[:, 0]]
+        for i in range(1, len(memberships)):
+            activation = np.fmin(activation, memberships[i][self.antecedents[:, i]])
+        cuts = np.zeros((len(self.output_mfs), activation.shape[1]))
+        for k in range(len(self.output_mfs)):
+            if np.any(self.consequents == k):
+                cuts[k] = activation[self.consequents == k].max(axis=0)
+
+        # Upsample the output universe with the points where each term meets its cut
+        universe = self.universe
+        n = activation.shape[1]
+        points = [np.broadcast_to(universe, (n, len(universe)))]
+        for mf, cut in zip(self.output_mfs, cuts):
+            c = cut[:, None]
+            above = np.where(c == 0, mf > 0, mf >= c)
+            crossing = above[:, :-1] != above[:, 1:]
+            step = np.diff(mf)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                xx = universe[:-1] + (c - mf[:-1]) * np.diff(universe) / np.where(step == 0, 1, step)
+            points.append(np.where(crossing, xx, universe[:-1]))
+        points = np.sort(np.concatenate(points, axis=1), axis=1)
+
+        output_mf = np.zeros_like(points)
+        for mf, cut in zip(self.output_mfs, cuts):
+            np.maximum(output_mf, np.minimum(cut[:, None], np.interp(points, universe, mf)), out=output_mf)
+
+        return _centroid(points, output_mf)
+
+    # Equivalent scikit-fuzzy control system of this config (for
+    # check_accuracy(reference=...)). Imported here so scoring never needs skfuzzy.
+    def to_control_system(self):
+        from skfuzzy import control as ctrl
+        inputs, output = self.config['inputs'], self.config['output']
+        variables = []
+        for name in self.input_names:
+            var = ctrl.Antecedent(_universe(inputs[name]['universe']), name)
+            for term, abc in inputs[name]['terms'].items():
+                var[term] = _trimf(var.universe, abc)
+            variables.append(var)
+        out = ctrl.Consequent(_universe(output['universe']), output['name'])
+        for term, abc in output['terms'].items():
+            out[term] = _trimf(out.universe, abc)
+
+        rules = []
+        for rule in self.config['rules']:
+            antecedent = variables[0][rule[0]]
+            for var, term in zip(variables[1:], rule[1:-1]):
+                antecedent = antecedent & var[term]
+            rules.append(ctrl.Rule(antecedent, out[rule[-1]]))
+        return ctrl.ControlSystem(rules)
+
+
+def _centroid(x, mfx):
+    dx = np.diff(x, axis=1)
+    y1, y2 = mfx[:, :-1], mfx[:, 1:]
+    moment_area = dx * dx * (y2 + 0.5 * y1) / 3.0 + x[:, :-1] * 0.5 * dx * (y1 + y2)
+    area = 0.5 * dx * (y1 + y2)
+    return moment_area.sum(axis=1) / np.fmax(area.sum(axis=1), np.finfo(float).eps)
+
+
+# Shared default instance (read-only, safe to use from any thread)
+DEFAULT_INFERENCE = FuzzyInference()
+
+
+def get_fuzzy_scores(health_vals, distance_vals, urgency_vals, inference=None):
+    return (inference or DEFAULT_INFERENCE).score(health_vals, distance_vals, urgency_vals)
+
 
 # Assignment function
-def get_fuzzy_assignment(health_val, distance_val, urgency_val):
-    task_simulator.input['health'] = health_val
-    task_simulator.input['distance'] = distance_val
-    task_simulator.input['urgency'] = urgency_val
-    task_simulator.compute()
-    return task_simulator.output['assign']
+def get_fuzzy_assignment(health_val, distance_val, urgency_val, inference=None):
+    return (inference or DEFAULT_INFERENCE)(health_val, distance_val, urgency_val)
+
+
+# Greedy assignment: repeatedly take the best-scoring free agent/task pair.
+# Agents left without a task map to None, as in the other engines.
+def get_fuzzy_task_assignment(agents, tasks, cost=None, inference=None):
+    result = {agent.id: None for agent in agents}
+    if not len(agents) or not len(tasks):
+        return result
+    cost = cost if cost is not None else CostMatrix(agents, tasks)
+    agent_ids = [a.id for a in agents]
+    task_ids = [t.id for t in tasks]
+    used_agents, used_tasks = set(), set()
+    if cost.sparse:
+        # Only each agent's k nearest tasks are scored
+        scores = cost.candidate_fuzzy_score if inference is None else cost.candidate_fuzzy(inference)
+        order = np.argsort(-scores, kind='stable')
+        rows, cols = cost.candidates[0][order], cost.candidates[1][order]
+    else:
+        scores = cost.fuzzy_score if inference is None else cost.fuzzy(inference)
+        order = np.argsort(-scores, axis=None, kind='stable')
+        rows, cols = np.unravel_index(order, scores.shape)
+    for i, j in zip(rows.tolist(), cols.tolist()):
+        if i not in used_agents and j not in used_tasks:
+            result[agent_ids[i]] = task_ids[j]
+            used_agents.add(i)
+            used_tasks.add(j)
+            if len(used_agents) == len(agent_ids) or len(used_tasks) == len(task_ids):
+                break
+    return result
+
+
+# === Reference Simulator ===
+# The original scikit-fuzzy system (automf(3) inputs and the hand-written rule
+# table), built independently of DEFAULT_CONFIG so check_accuracy() catches a
+# wrong membership function or rule in the config, not just compilation errors.
+REFERENCE_RULES = {
+    # (health, distance, urgency) -> assign
+    ('good', 'poor', 'good'): 'high', ('good', 'average', 'good'): 'high', ('good', 'good', 'good'): 'medium',
+    ('good', 'poor', 'average'): 'high', ('good', 'average', 'average'): 'medium',
+    ('good', 'good', 'average'): 'medium', ('good', 'poor', 'poor'): 'medium',
+    ('good', 'average', 'poor'): 'medium', ('good', 'good', 'poor'): 'low',
+
+    ('average', 'poor', 'good'): 'high', ('average', 'average', 'good'): 'high',
+    ('average', 'good', 'good'): 'medium', ('average', 'poor', 'average'): 'high',
+    ('average', 'average', 'average'): 'medium', ('average', 'good', 'average'): 'medium',
+    ('average', 'poor', 'poor'): 'medium', ('average', 'average', 'poor'): 'medium',
+    ('average', 'good', 'poor'): 'low',
+
+    ('poor', 'poor', 'good'): 'medium', ('poor', 'average', 'good'): 'medium', ('poor', 'good', 'good'): 'low',
+    ('poor', 'poor', 'average'): 'medium', ('poor', 'average', 'average'): 'low',
+    ('poor', 'good', 'average'): 'low', ('poor', 'poor', 'poor'): 'low', ('poor', 'average', 'poor'): 'low',
+    ('poor', 'good', 'poor'): 'low',
+}
+
+
+def reference_control_system():
+    import skfuzzy as fuzz
+    from skfuzzy import control as ctrl
+    health = ctrl.Antecedent(np.arange(0, 101, 1), 'health')
+    distance = ctrl.Antecedent(np.arange(0, 10, 1), 'distance')
+    urgency = ctrl.Antecedent(np.arange(0, 11, 1), 'urgency')
+    assign = ctrl.Consequent(np.arange(0, 11, 1), 'assign')
+    for var in (health, distance, urgency):
+        var.automf(3)
+    assign['low'] = fuzz.trimf(assign.universe, [0, 0, 5])
+    assign['medium'] = fuzz.trimf(assign.universe, [2, 5, 8])
+    assign['high'] = fuzz.trimf(assign.universe, [5, 10, 10])
+    rules = [ctrl.Rule(health[h] & distance[d] & urgency[u], assign[out])
+             for (h, d, u), out in REFERENCE_RULES.items()]
+    return ctrl.ControlSystem(rules)
+
+
+# Accuracy check of the compiled scorer against a scikit-fuzzy simulator:
+# by default the original system above. Pass
+# `reference=inference.to_control_system()` to only check that a custom
+# config compiles faithfully.
+def check_accuracy(samples=2000, seed=0, inference=None, reference=None):
+    from skfuzzy import control as ctrl
+    inference = inference or DEFAULT_INFERENCE
+    simulator = ctrl.ControlSystemSimulation(reference if reference is not None else reference_control_system())
+
+    def expected_score(*values):
+        for name, v in zip(inference.input_names, values):
+            simulator.input[name] = v
+        simulator.compute()
+        return simulator.output[inference.config['output']['name']]
+
+    rng = np.random.default_rng(seed)
+    h = rng.uniform(-10, 110, samples)
+    d = rng.uniform(-1, 15, samples)
+    u = rng.uniform(-1, 12, samples)
+    # Include the integer lattice corners, where cuts hit peaks exactly
+    h = np.concatenate([h, np.repeat([0, 50, 100], 9)])
+    d = np.concatenate([d, np.tile(np.repeat([0, 4.5, 9], 3), 3)])
+    u = np.concatenate([u, np.tile([0, 5, 10], 9)])
+    expected = np.array([expected_score(*args) for args in zip(h, d, u)])
+    return float(np.max(np.abs(inference.score(h, d, u) - expected)))
+
+
+if __name__ == '__main__':
+    print(f"Max abs error vs the original automf(3) simulator: {check_accuracy():.3e}")
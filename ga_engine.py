@@ -1,58 +1,132 @@
-from pyeasyga.pyeasyga import GeneticAlgorithm
-import random
-
-def get_ga_assignment(agents, tasks):
-    # Create a flat list of (agent, task) pairings as possible genes
-    data = [(agent, task) for agent in agents for task in tasks]
-
-    def fitness(individual, data):
-        total_score = 0
-        used_agents = set()
-        used_tasks = set()
-
-        for i, bit in enumerate(individual):
-            if bit == 1:
-                agent, task = data[i]
-                if agent.id in used_agents or task.id in used_tasks:
-                    continue  # Avoid duplicate assignments
-                dist = abs(agent.x - task.x) + abs(agent.y - task.y)
-                score = agent.health * 0.5 + task.urgency * 0.3 - dist * 0.2
-                total_score += score
-                used_agents.add(agent.id)
-                used_tasks.add(task.id)
-
-        return total_score
-
-    ga = GeneticAlgorithm(data)
-    ga.fitness_function = fitness
-    ga.population_size = 50
-    ga.generations = 100
-    ga.mutation_probability = 0.1
-    ga.crossover_probability = 0.8
-
-    def create_individual(data):
-        # Start with all 0s, then randomly activate num_agents genes
-        num_genes = len(data)
-        num_agents = len(agents)
-        idxs = random.sample(range(num_genes), num_agents)
-        individual = [1 if i in idxs else 0 for i in range(num_genes)]
-        return individual
-
-    ga.create_individual = create_individual
-
-    ga.run()
-
-    # Get the best individual properly
-    best_individual = ga.best_individual()[1]  # The individual is the second element
-
-    assignment = {}
-    used_tasks = set()
-
-    for i, bit in enumerate(best_individual):
-        if bit == 1:
-            agent, task = data[i]
-            if agent.id not in assignment and task.id not in used_tasks:
-                assignment[agent.id] = task.id
-                used_tasks.add(task.id)
-
-    return assignment
\ No newline at end of file
+import time
+import numpy as np
+from cost_matrix import CostMatrix
+
+# Genetic algorithm over a population matrix of permutations.
+# Row k of the population is a permutation of range(L), L = max(agents, tasks):
+# gene i is the task index given to agent i. Indices >= num_tasks are dummy
+# tasks (agent left idle) and genes >= num_agents are unused, so every
+# individual is a valid one-to-one assignment and needs no repair.
+#
+# With a `deadline` (time.perf_counter() value) the generation cap is lifted:
+# evolution stops on stalling or before a generation that would not finish in
+# time (judged by how long the previous one took), whichever comes first.
+# `initial` is a permutation seeded into the first population, e.g. a greedy
+# solution, so the result is never worse than it; if the setup alone uses up
+# the time, the best of the first population (at least `initial`) is returned.
+def get_ga_assignment(agents, tasks, cost=None, population_size=50, generations=100,
+                      mutation_probability=0.1, crossover_probability=0.8,
+                      elite=2, patience=20, tol=1e-9, seed=None, deadline=None, initial=None):
+    # Every agent is in the result; idle ones map to None, as in the other engines
+    result = {agent.id: None for agent in agents}
+    num_agents, num_tasks = len(agents), len(tasks)
+    if num_agents == 0 or num_tasks == 0:
+        return result
+
+    cost = cost if cost is not None else CostMatrix(agents, tasks)
+    score = cost.ga_score
+    rng = np.random.default_rng(seed)
+    size = max(num_agents, num_tasks)
+
+    # Dummy rows/columns score 0, i.e. leaving an agent idle
+    padded = np.zeros((size, size))
+    padded[:num_agents, :num_tasks] = score
+
+    population = np.argsort(rng.random((population_size, size)), axis=1)
+    if initial is not None:
+        population[0] = initial
+    started = time.perf_counter()
+    fit = fitness(padded, population)
+    best = population[np.argmax(fit)].copy()
+    best_fit = fit.max()
+    stall = 0
+    evaluations = population_size
+    # Until one has run, a generation is assumed to cost one fitness evaluation
+    last = time.perf_counter() - started
+
+    generation = 0
+    while generation < generations or deadline is not None:
+        started = time.perf_counter()
+        # Twice the last duration: steps vary, and the result still has to be decoded
+        if deadline is not None and started + 2 * last >= deadline:
+            break
+        generation += 1
+        population, fit = next_generation(padded, population, fit, rng, mutation_probability,
+                                          crossover_probability, elite)
+        evaluations += len(population)
+        last = time.perf_counter() - started
+
+        # Early stopping once the best score stops improving
+        if fit.max() > best_fit + tol:
+            best_fit = fit.max()
+            best = population[np.argmax(fit)].copy()
+            stall = 0
+        else:
+            stall += 1
+            if stall >= patience:
+                break
+
+    cost.stats['fitness_evaluations'] = evaluations
+    for i, j in enumerate(best[:num_agents]):
+        if j < num_tasks:
+            result[agents[i].id] = tasks[int(j)].id
+    return result
+
+
+def fitness(padded, population):
+    return padded[np.arange(padded.shape[0]), population].sum(axis=1)
+
+
+def _tournament(fit, n, rng):
+    contenders = rng.integers(0, len(fit), (n, 2))
+    winners = np.argmax(fit[contenders], axis=1)
+    return contenders[np.arange(n), winners]
+
+
+# One generation: tournament selection, order crossover, swap mutation, and
+# the `elite` best individuals carried over unchanged
+def next_generation(padded, population, fit, rng, mutation_probability=0.1, crossover_probability=0.8, elite=2):
+    population_size, size = population.shape
+    elite = min(elite, population_size)
+    n_children = population_size - elite
+    order = np.argsort(-fit)
+    parents1 = population[_tournament(fit, n_children, rng)]
+    parents2 = population[_tournament(fit, n_children, rng)]
+    children = parents1.copy()
+
+    crossed = rng.random(n_children) < crossover_probability
+    if crossed.any():
+        children[crossed] = _order_crossover(parents1[crossed], parents2[crossed], rng)
+
+    # Swap mutation keeps each child a permutation
+    mutated = np.flatnonzero(rng.random(n_children) < mutation_probability)
+    if len(mutated):
+        i = rng.integers(0, size, len(mutated))
+        j = rng.integers(0, size, len(mutated))
+        children[mutated, i], children[mutated, j] = children[mutated, j], children[mutated, i]
+
+    population = np.vstack([population[order[:elite]], children])
+    return population, fitness(padded, population)
+
+
+# Order crossover (OX), vectorized over all pairs: each child keeps a random
+# slice of parent 1 and fills the other positions with the remaining genes in
+# parent 2 order.
+def _order_crossover(parents1, parents2, rng):
+    n, size = parents1.shape
+    rows = np.arange(n)[:, None]
+    cuts = np.sort(rng.integers(0, size + 1, (n, 2)), axis=1)
+    positions = np.arange(size)
+    in_slice = (positions >= cuts[:, :1]) & (positions < cuts[:, 1:])
+
+    # Genes already placed from parent 1
+    taken = np.zeros((n, size), dtype=bool)
+    taken[np.nonzero(in_slice)[0], parents1[in_slice]] = True
+
+    # Free positions first (in order), matched with parent 2's untaken genes (in order)
+    free_positions = np.argsort(in_slice, axis=1, kind='stable')
+    fill_order = np.argsort(taken[rows, parents2], axis=1, kind='stable')
+    children = np.empty_like(parents1)
+    children[rows, free_positions] = parents2[rows, fill_order]
+    children[in_slice] = parents1[in_slice]
+    return children
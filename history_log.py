@@ -0,0 +1,101 @@
+import os
+import sys
+import tempfile
+import numpy as np
+
+# One record per assignment change: at solve number `event` (virtual time
+# `time`), `agent` switched to `task` (-1 = unassigned). The log file is a
+# flat array of these little-endian records, readable with np.memmap.
+RECORD = np.dtype([('event', '<u4'), ('time', '<f8'), ('agent', '<i8'), ('task', '<i8')])
+NO_TASK = -1
+
+
+# Append-only assignment history. Only changes are written, through a small
+# write buffer, and only the current assignment is kept in memory, so memory
+# stays flat however long the simulation runs.
+class AssignmentLog:
+    def __init__(self, path=None, buffer_size=4096):
+        self.temporary = path is None
+        if self.temporary:
+            fd, path = tempfile.mkstemp(prefix='assignments_', suffix='.bin')
+            os.close(fd)
+        self.path = path
+        self._file = open(path, 'wb')
+        self._buffer = np.empty(buffer_size, dtype=RECORD)
+        self._pending = 0
+        self._current = {}  # agent -> task, the last logged assignment
+        self.events = 0
+        self.records = 0
+
+    def __len__(self):
+        return self.events
+
+    def record(self, time, assignment):
+        event = self.events
+        for aid, tid in assignment.items():
+            tid = NO_TASK if tid is None else tid
+            if aid not in self._current or self._current[aid] != tid:
+                self._append(event, time, aid, tid)
+                self._current[aid] = tid
+        for aid in [aid for aid in self._current if aid not in assignment]:
+            if self._current.pop(aid) != NO_TASK:
+                self._append(event, time, aid, NO_TASK)
+        self.events += 1
+
+    def _append(self, event, time, aid, tid):
+        if self._pending == len(self._buffer):
+            self.flush()
+        self._buffer[self._pending] = (event, time, aid, tid)
+        self._pending += 1
+        self.records += 1
+
+    def flush(self):
+        if self._pending:
+            self._file.write(self._buffer[:self._pending].tobytes())
+            self._pending = 0
+        self._file.flush()
+
+    def read(self):
+        self.flush()
+        return read_log(self.path)
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+        if self.temporary:
+            os.remove(self.path)
+
+
+# === Offline Reading ===
+def read_log(path):
+    # Memory-mapped, so only the pages actually touched are loaded
+    if os.path.getsize(path) < RECORD.itemsize:
+        return np.zeros(0, dtype=RECORD)
+    return np.memmap(path, dtype=RECORD, mode='r')
+
+
+# Per-agent change points: agent -> (events, tasks), tasks as float with
+# NaN for unassigned so they plot as gaps
+def agent_series(records):
+    series = {}
+    order = np.argsort(records['agent'], kind='stable')
+    agents = records['agent'][order]
+    bounds = np.flatnonzero(np.diff(agents)) + 1
+    for chunk in np.split(order, bounds):
+        if len(chunk):
+            tasks = records['task'][chunk].astype(float)
+            tasks[tasks == NO_TASK] = np.nan
+            series[int(records['agent'][chunk[0]])] = (records['event'][chunk], tasks)
+    return series
+
+
+def summarize(records):
+    events = int(records['event'].max()) + 1 if len(records) else 0
+    return {'events': events, 'records': len(records), 'agents': len(np.unique(records['agent'])),
+            'duration': float(records['time'].max() - records['time'].min()) if len(records) else 0.0}
+
+
+if __name__ == '__main__':
+    print(summarize(read_log(sys.argv[1])))
@@ -0,0 +1,50 @@
+import numpy as np
+from cost_matrix import CostMatrix
+
+# Exact assignment (Jonker-Volgenant via SciPy), polynomial in agents x tasks.
+# Uses the same score as the PSO engine; works for rectangular problems.
+# With a sparse cost (CostMatrix(k=...)) only each agent's k nearest tasks
+# are considered, so the matrix never has to be built densely.
+def get_hungarian_assignment(agents, tasks, cost=None):
+    # SciPy is imported on first solve so importing the engine stays cheap
+    from scipy.optimize import linear_sum_assignment
+
+    result = {agent.id: None for agent in agents}
+    if not agents or not tasks:
+        return result
+
+    cost = cost if cost is not None else CostMatrix(agents, tasks)
+    if cost.sparse:
+        rows, cols = _sparse_assignment(cost)
+    else:
+        rows, cols = linear_sum_assignment(cost.pso_score, maximize=True)
+    for i, j in zip(rows, cols):
+        result[agents[i].id] = tasks[j].id
+    return result
+
+
+# Min-weight matching over the candidate pairs. The smaller side must be
+# matched in full, so each of its members gets a private dummy partner: an
+# idle task per agent, or with more agents than tasks a stand-in agent per
+# task. The dummy weight is high enough that assigning more agents always wins
+# over a better score.
+def _sparse_assignment(cost):
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+
+    n, m = cost.shape
+    rows, cols = cost.candidates
+    score = cost.candidate_pso_score
+    weight = score.max() - score + 1  # strictly positive, so no entry is dropped
+    idle = min(n, m) * weight.max() + 1
+    if n <= m:
+        dummy_rows, dummy_cols, shape = np.arange(n), m + np.arange(n), (n, m + n)
+    else:
+        dummy_rows, dummy_cols, shape = n + np.arange(m), np.arange(m), (n + m, m)
+
+    graph = coo_matrix((np.concatenate([weight, np.full(len(dummy_rows), idle)]),
+                        (np.concatenate([rows, dummy_rows]), np.concatenate([cols, dummy_cols]))),
+                       shape=shape).tocsr()
+    matched_rows, matched_cols = min_weight_full_bipartite_matching(graph)
+    real = (matched_rows < n) & (matched_cols < m)
+    return matched_rows[real], matched_cols[real]
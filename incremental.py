@@ -0,0 +1,235 @@
+import numpy as np
+from cost_matrix import CostMatrix, PSO_WEIGHTS
+
+
+def assignment_stability(previous, current):
+    # Share of previously assigned agents that kept the same task
+    kept = [aid for aid, tid in previous.items() if tid is not None]
+    if not kept:
+        return 1.0
+    return sum(current.get(aid) == previous[aid] for aid in kept) / len(kept)
+
+
+# Keeps a score matrix and an assignment alive between solves. Changes touch
+# only the affected rows/columns, and repair() fixes the previous solution with
+# a local search (free pairing, switch, swap, and ejection chains) started at
+# the changed agents/tasks. The agent roster is fixed for the assigner's
+# lifetime; build a new one if agents are added or removed.
+class IncrementalAssigner:
+    def __init__(self, agents, tasks, weights=PSO_WEIGHTS, tol=1e-9):
+        from scipy.optimize import linear_sum_assignment
+
+        self.agents = agents
+        self.tasks = tasks
+        self.weights = weights
+        self.tol = tol
+
+        cost = CostMatrix(agents, tasks)
+        self.agent_ids = list(cost.agent_ids)
+        self.task_ids = list(cost.task_ids)
+        self.row = {aid: r for r, aid in enumerate(self.agent_ids)}
+        self.col = {tid: c for c, tid in enumerate(self.task_ids)}
+        n, m = cost.shape
+        capacity = max(16, 2 * m)
+
+        self.agent_pos = cost.agent_pos.copy()
+        self.health = cost.health.copy()
+        self.speed = np.maximum(cost.speed, 0.1)
+        self.task_pos = np.zeros((capacity, 2))
+        self.task_pos[:m] = cost.task_pos
+        self.urgency = np.zeros(capacity)
+        self.urgency[:m] = cost.urgency
+        self.score = np.zeros((n, capacity))
+        self.score[:, :m] = cost.score(weights, cost.time_to_reach)
+
+        # Start from the optimal assignment
+        self.assign = np.full(n, -1)
+        self.owner = np.full(capacity, -1)
+        if n and m:
+            rows, cols = linear_sum_assignment(self.score[:, :m], maximize=True)
+            self.assign[rows] = cols
+            self.owner[cols] = rows
+
+        self._dirty_agents, self._dirty_tasks = set(), set()
+        self._pending_agents, self._pending_tasks = set(), set()
+        self.last_moves = 0
+
+    @property
+    def num_tasks(self):
+        return len(self.task_ids)
+
+    # === Change Notifications ===
+    def agent_changed(self, aid, repair=True):
+        self._dirty_agents.add(aid)
+        if repair:
+            self._pending_agents.add(aid)
+
+    def task_changed(self, tid, repair=True):
+        self._dirty_tasks.add(tid)
+        if repair:
+            self._pending_tasks.add(tid)
+
+    def add_task(self, tid):
+        c = self.num_tasks
+        if c == len(self.urgency):
+            self._grow()
+        self.task_ids.append(tid)
+        self.col[tid] = c
+        self.owner[c] = -1
+        self.task_changed(tid)
+
+    def remove_task(self, tid):
+        c = self.col.pop(tid)
+        last = self.num_tasks - 1
+        r = self.owner[c]
+        if r >= 0:
+            self.assign[r] = -1
+            self._pending_agents.add(self.agent_ids[r])
+        # Move the last column into the freed slot
+        if c != last:
+            moved = self.task_ids[last]
+            self.task_ids[c] = moved
+            self.col[moved] = c
+            self.score[:, c] = self.score[:, last]
+            self.task_pos[c] = self.task_pos[last]
+            self.urgency[c] = self.urgency[last]
+            self.owner[c] = self.owner[last]
+            if self.owner[c] >= 0:
+                self.assign[self.owner[c]] = c
+        self.owner[last] = -1
+        self.task_ids.pop()
+        self._dirty_tasks.discard(tid)
+        self._pending_tasks.discard(tid)
+
+    def _grow(self):
+        capacity = 2 * len(self.urgency)
+        self.task_pos = np.resize(self.task_pos, (capacity, 2))
+        self.urgency = np.resize(self.urgency, capacity)
+        owner = np.full(capacity, -1)
+        owner[:len(self.owner)] = self.owner
+        self.owner = owner
+        score = np.zeros((len(self.agent_ids), capacity))
+        score[:, :self.score.shape[1]] = self.score
+        self.score = score
+
+    # === Score Updates (affected rows / columns only) ===
+    def _refresh(self):
+        w_health, w_urgency, w_travel = self.weights
+        m = self.num_tasks
+        rows = [self.row[aid] for aid in self._dirty_agents if aid in self.row]
+        for r in rows:
+            agent = self.agents.get(self.agent_ids[r])
+            self.agent_pos[r] = agent.x, agent.y
+            self.health[r] = agent.health
+            self.speed[r] = max(agent.speed, 0.1)
+        cols = [self.col[tid] for tid in self._dirty_tasks if tid in self.col]
+        for c in cols:
+            task = self.tasks.get(self.task_ids[c])
+            self.task_pos[c] = task.x, task.y
+            self.urgency[c] = task.urgency
+
+        if rows:
+            rows = np.array(rows)
+            dist = np.abs(self.agent_pos[rows, None, :] - self.task_pos[None, :m, :]).sum(axis=2)
+            self.score[rows, :m] = (self.health[rows, None] * w_health + self.urgency[None, :m] * w_urgency
+                                    - dist / self.speed[rows, None] * w_travel)
+        if cols:
+            cols = np.array(cols)
+            dist = np.abs(self.agent_pos[:, None, :] - self.task_pos[None, cols, :]).sum(axis=2)
+            self.score[:, cols] = (self.health[:, None] * w_health + self.urgency[None, cols] * w_urgency
+                                   - dist / self.speed[:, None] * w_travel)
+        self._dirty_agents.clear()
+        self._dirty_tasks.clear()
+
+    # === Local Search Repair ===
+    def repair(self, max_moves=None):
+        self._refresh()
+        queue = [('agent', self.row[aid]) for aid in self._pending_agents if aid in self.row]
+        queue += [('task', self.col[tid]) for tid in self._pending_tasks if tid in self.col]
+        self._pending_agents.clear()
+        self._pending_tasks.clear()
+
+        # Every applied move raises the total score (or the number of
+        # assigned pairs), so the search terminates; max_moves is a safety cap.
+        if max_moves is None:
+            max_moves = 4 * (len(self.agent_ids) + self.num_tasks)
+        moves = 0
+        while queue and moves < max_moves:
+            kind, i = queue.pop()
+            follow_up = self._improve_agent(i) if kind == 'agent' else self._improve_task(i)
+            if follow_up is not None:
+                moves += 1
+                queue.extend(follow_up)
+        self.last_moves = moves
+        return self.assignment()
+
+    def _improve_agent(self, r):
+        m = self.num_tasks
+        if m == 0:
+            return None
+        cols = np.arange(m)
+        row = self.score[r, :m]
+        owners = self.owner[:m]
+        free = owners < 0
+        cur = self.assign[r]
+
+        if cur < 0:
+            if free.any():
+                self._take(r, int(np.argmax(np.where(free, row, -np.inf))))
+                return []
+            # Steal a task; its holder becomes free
+            gain = row - self.score[owners, cols]
+        else:
+            cur_val = row[cur]
+            gain = row - cur_val
+            held = ~free
+            others = owners[held]
+            gain[held] = row[held] + self.score[others, cur] - cur_val - self.score[others, cols[held]]
+
+        c = int(np.argmax(gain))
+        if gain[c] <= self.tol:
+            return None
+        other = self.owner[c]
+        self._take(r, c)
+        follow_up = [('agent', r)]
+        if other >= 0:
+            if cur >= 0:
+                self._take(other, cur)  # swap
+            follow_up.append(('agent', other))
+        elif cur >= 0:
+            follow_up.append(('task', cur))
+        return follow_up
+
+    def _improve_task(self, c):
+        if c >= self.num_tasks or self.owner[c] >= 0 or not len(self.agent_ids):
+            return None
+        column = self.score[:, c]
+        free = self.assign < 0
+        if free.any():
+            self._take(int(np.argmax(np.where(free, column, -np.inf))), c)
+            return []
+        # Move an agent over if it gains; its old task is freed (ejection chain)
+        gain = column - self.score[np.arange(len(self.assign)), self.assign]
+        r = int(np.argmax(gain))
+        if gain[r] <= self.tol:
+            return None
+        old = self.assign[r]
+        self._take(r, c)
+        return [('task', old)]
+
+    def _take(self, r, c):
+        old = self.assign[r]
+        if old >= 0 and self.owner[old] == r:
+            self.owner[old] = -1
+        other = self.owner[c]
+        if other >= 0:
+            self.assign[other] = -1
+        self.assign[r] = c
+        self.owner[c] = r
+
+    def assignment(self):
+        return {aid: (self.task_ids[c] if c >= 0 else None) for aid, c in zip(self.agent_ids, self.assign)}
+
+    def total_score(self):
+        assigned = self.assign >= 0
+        return float(self.score[np.flatnonzero(assigned), self.assign[assigned]].sum())
@@ -0,0 +1,195 @@
+import multiprocessing as mp
+import os
+import queue
+import time
+import traceback
+from multiprocessing import shared_memory
+import numpy as np
+from cost_matrix import CostMatrix
+import ga_engine
+import pso_engine
+
+DEFAULT_EPOCHS = 20  # Epochs per island when no time budget is given
+RESULT_POLL_SECONDS = 0.5  # How often the parent checks that islands are still alive
+REPORT_SLACK = 5.0  # Seconds past the deadline islands get to report back
+
+
+# Island model: independent GA populations or PSO swarms, one per process,
+# evolve against a single score matrix in shared memory. After every epoch
+# each island sends its best `migrants` individuals to the next island in a
+# ring and replaces its worst individuals with whatever has arrived. Islands
+# share nothing else, so throughput scales with the number of cores.
+#
+# With `time_budget` (seconds) or a `deadline` (time.perf_counter() value) the
+# islands keep evolving until it runs out and the best valid assignment found
+# by any island is returned. `initial` seeds every island with a permutation.
+# An island that fails raises RuntimeError here (with the worker's traceback).
+def get_island_assignment(agents, tasks, cost=None, algorithm='ga', islands=None, population_size=50,
+                          epoch_generations=10, epochs=None, migrants=2, time_budget=None, seed=None,
+                          deadline=None, initial=None):
+    result = {agent.id: None for agent in agents}
+    num_agents, num_tasks = len(agents), len(tasks)
+    if not num_agents or not num_tasks:
+        return result
+
+    cost = cost if cost is not None else CostMatrix(agents, tasks)
+    score = cost.ga_score if algorithm == 'ga' else cost.pso_score
+    size = max(num_agents, num_tasks)
+    if initial is not None and len(initial) != size:
+        raise ValueError(f"initial must be a permutation of range({size}), got length {len(initial)}")
+    islands = islands or os.cpu_count() or 1
+    if deadline is not None:
+        remaining = max(0.0, deadline - time.perf_counter())
+        time_budget = remaining if time_budget is None else min(time_budget, remaining)
+    if epochs is None:
+        epochs = DEFAULT_EPOCHS if time_budget is None else float('inf')
+    # Wall-clock deadline, comparable across processes
+    stop_at = time.time() + time_budget if time_budget is not None else None
+
+    shm = shared_memory.SharedMemory(create=True, size=size * size * 8)
+    processes = []
+    try:
+        padded = np.ndarray((size, size), dtype=float, buffer=shm.buf)
+        padded[:] = 0
+        padded[:num_agents, :num_tasks] = score
+
+        ctx = mp.get_context()
+        inboxes = [ctx.Queue() for _ in range(islands)]
+        results = ctx.Queue()
+        seeds = np.random.SeedSequence(seed).spawn(islands)
+        for i in range(islands):
+            args = (shm.name, size, algorithm, seeds[i], inboxes[i], inboxes[(i + 1) % islands], results,
+                    population_size, epoch_generations, epochs, migrants, stop_at, initial)
+            processes.append(ctx.Process(target=_run_island, args=args, daemon=True))
+        for process in processes:
+            process.start()
+
+        best, best_fit, evaluations = None, -np.inf, 0
+        reported = 0
+        while reported < islands:
+            # Checked before waiting: a process that is already gone has flushed its result
+            alive = any(process.is_alive() for process in processes)
+            try:
+                outcome = results.get(timeout=RESULT_POLL_SECONDS)
+            except queue.Empty:
+                if not alive:
+                    failed = [process.exitcode for process in processes if process.exitcode]
+                    if failed:
+                        raise RuntimeError(f"Island process exited without a result (exit codes {failed})")
+                    break
+                # Islands stop on their own at the deadline; allow a little slack to report back
+                if stop_at is not None and time.time() > stop_at + REPORT_SLACK:
+                    break
+                continue
+            if isinstance(outcome, Exception):
+                raise outcome
+            individual, fit, island_evaluations = outcome
+            reported += 1
+            evaluations += island_evaluations
+            if fit > best_fit:
+                best, best_fit = individual, fit
+    finally:
+        for process in processes:
+            process.join(timeout=1.0)
+            if process.is_alive():
+                process.terminate()
+        shm.close()
+        shm.unlink()
+
+    cost.stats['fitness_evaluations'] = evaluations
+    if best is None:
+        return result
+    genes = best if algorithm == 'ga' else np.argsort(best)
+    for i, j in enumerate(genes[:num_agents]):
+        if j < num_tasks:
+            result[agents[i].id] = tasks[int(j)].id
+    return result
+
+
+# === Island Worker (runs in its own process) ===
+def _run_island(shm_name, size, algorithm, seed, inbox, outbox, results, population_size,
+                epoch_generations, epochs, migrants, deadline, initial=None):
+    # Migrants left unread when a neighbour finishes must not block exit
+    outbox.cancel_join_thread()
+    shm = shared_memory.SharedMemory(name=shm_name)
+    padded = None
+    try:
+        padded = np.ndarray((size, size), dtype=float, buffer=shm.buf)
+        island = (_GAIsland if algorithm == 'ga' else _PSOIsland)(padded, population_size, np.random.default_rng(seed),
+                                                                  initial)
+        epoch = 0
+        while epoch < epochs and (deadline is None or time.time() < deadline):
+            for _ in range(epoch_generations):
+                island.step()
+                if deadline is not None and time.time() >= deadline:
+                    break
+            outbox.put(island.emigrants(migrants))
+            while True:
+                try:
+                    island.immigrate(inbox.get_nowait())
+                except queue.Empty:
+                    break
+            epoch += 1
+        best, best_fit = island.best()
+        results.put((best, best_fit, island.evaluations))
+    except Exception:
+        # Reported instead of dying silently; the parent re-raises it
+        results.put(RuntimeError(f"Island worker failed:\n{traceback.format_exc()}"))
+    finally:
+        del padded
+        shm.close()
+
+
+class _GAIsland:
+    def __init__(self, padded, population_size, rng, initial=None):
+        self.padded, self.rng = padded, rng
+        self.population = np.argsort(rng.random((population_size, len(padded))), axis=1)
+        if initial is not None:
+            self.population[0] = initial
+        self.fit = ga_engine.fitness(padded, self.population)
+        self.evaluations = population_size
+
+    def step(self):
+        self.population, self.fit = ga_engine.next_generation(self.padded, self.population, self.fit, self.rng)
+        self.evaluations += len(self.population)
+
+    def emigrants(self, n):
+        return self.population[np.argsort(-self.fit)[:n]].copy()
+
+    def immigrate(self, individuals):
+        worst = np.argsort(self.fit)[:len(individuals)]
+        self.population[worst] = individuals
+        self.fit[worst] = ga_engine.fitness(self.padded, individuals)
+
+    def best(self):
+        i = int(np.argmax(self.fit))
+        return self.population[i].copy(), float(self.fit[i])
+
+
+class _PSOIsland:
+    def __init__(self, padded, swarmsize, rng, initial=None):
+        self.padded, self.rng = padded, rng
+        self.x = rng.random((swarmsize, len(padded)))
+        if initial is not None:
+            self.x[0] = pso_engine.permutation_keys(initial)
+        self.v = rng.uniform(-1, 1, self.x.shape)
+        self.p, self.fp = self.x.copy(), pso_engine.fitness(padded, self.x)
+        self.evaluations = swarmsize
+
+    def step(self):
+        g = self.p[np.argmax(self.fp)]
+        self.x, self.v = pso_engine.swarm_step(self.padded, self.x, self.v, self.p, self.fp, g, self.rng)
+        self.evaluations += len(self.x)
+
+    def emigrants(self, n):
+        return self.p[np.argsort(-self.fp)[:n]].copy()
+
+    def immigrate(self, positions):
+        # Immigrants replace the worst particles and their personal bests
+        worst = np.argsort(self.fp)[:len(positions)]
+        self.x[worst] = self.p[worst] = positions
+        self.fp[worst] = pso_engine.fitness(self.padded, positions)
+
+    def best(self):
+        i = int(np.argmax(self.fp))
+        return self.p[i].copy(), float(self.fp[i])
@@ -1,21 +1,17 @@
-import pygame
-import random
+import argparse
 import time
-import matplotlib.pyplot as plt
-import heapq
-from agent import Agent
-from task import Task
-from battlefield import Battlefield
-from pso_engine import get_pso_assignment
-from ga_engine import get_ga_assignment
-from fuzzy_engine import get_fuzzy_assignment
+import numpy as np
+from fuzzy_engine import get_fuzzy_scores
+from cost_matrix import CostMatrix, CHART_PSO_WEIGHTS, GA_WEIGHTS
+from history_log import agent_series
+from metrics import PhaseTimer, plot_performance
+from solver_service import SolverService
+from simulation import Simulation, MODES, GRID_WIDTH, GRID_HEIGHT, TICK, TASK_DURATION
 
 # === Settings ===
 CELL_SIZE = 50
-GRID_WIDTH = 10
-GRID_HEIGHT = 10
-WINDOW_WIDTH = GRID_WIDTH * CELL_SIZE
-WINDOW_HEIGHT = GRID_HEIGHT * CELL_SIZE
+MAX_VIEW_COLS = 20  # Visible cells at most; arrow keys pan over larger maps
+MAX_VIEW_ROWS = 16
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 RED = (200, 50, 50)
@@ -23,165 +19,75 @@ GREEN = (50, 200, 50)
 BLUE = (50, 50, 200)
 YELLOW = (255, 255, 0)
 DARK_RED = (150, 0, 0)
-
-TASK_DURATION = 15
-TASK_LIMIT = 10
-TASK_ADD_INTERVAL = 3  # New task frequency (seconds)
-ASSIGNMENT_LOG_INTERVAL = 7  # Log assignment details every 7 seconds
-
-pygame.init()
-screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-pygame.display.set_caption("Battlefield Assignment")
-font = pygame.font.SysFont(None, 24)
-battle = Battlefield()
-
-# === Initialization ===
-agents = []
-tasks = []
-assignments = {}  # Current agent-task assignments
-assignment_history = []  # Log of assignments over time
-task_timers = {}  # Task creation timestamps
-progress_timers = {}  # Task progress trackers
-unassigned_tasks = set()
-agent_targets = {}  # Target positions for agents
-selected_agent_id = None
-current_mode = 'fuzzy'
-occupied_positions = set()
-last_task_add = time.time()
-last_assignment_log_time = 0
-
-# === Utility Function: Get Unique Grid Position ===
-def get_unique_position():
-    while True:
-        x, y = random.randint(0, GRID_WIDTH - 1), random.randint(0, GRID_HEIGHT - 1)
-        if (x, y) not in occupied_positions:
-            occupied_positions.add((x, y))
-            return x, y
-
-# Initialize agents
-for i in range(3):
-    x, y = get_unique_position()
-    agents.append(Agent(i+1, 'Attacker', x, y, health=random.randint(50, 100), stamina=random.randint(50, 100), speed=random.randint(1, 5)))
-
-# Initialize tasks
-for i in range(3):
-    x, y = get_unique_position()
-    task = Task(i+1, 'Task', x, y, urgency=random.randint(5, 10))
-    tasks.append(task)
-    task_timers[task.id] = time.time()
-    progress_timers[task.id] = 0
-
-# === Assignment Logic ===
-def assign_tasks(mode):
-    global last_assignment_log_time
-    assignments.clear()
-
-    if mode == 'pso':
-        result = get_pso_assignment(agents, tasks)
-    elif mode == 'ga':
-        result = get_ga_assignment(agents, tasks)
-    else:
-        result = fuzzy_assignment()
-
-    assignments.update(result)
-    assignment_history.append(assignments.copy())
-
-    # Log assignment scores periodically
-    now = time.time()
-    if now - last_assignment_log_time >= ASSIGNMENT_LOG_INTERVAL:
-        print("\n=== Assignment Results ===")
-        for aid, tid in assignments.items():
-            agent = next((a for a in agents if a.id == aid), None)
-            task = next((t for t in tasks if t.id == tid), None)
-            if agent and task:
-                dist = ((agent.x - task.x)**2 + (agent.y - task.y)**2)**0.5
-                score = get_fuzzy_assignment(agent.health, dist, task.urgency)
-                print(f"✅ Agent {aid} assigned to Task {tid} with Score {score:.2f} and Distance {dist:.2f}")
-        last_assignment_log_time = now
-
-# === Fuzzy Assignment Function ===
-def fuzzy_assignment():
-    heap, result = [], {}
-    used_agents, used_tasks = set(), set()
-    for agent in agents:
-        for task in tasks:
-            dist = ((agent.x - task.x)**2 + (agent.y - task.y)**2)**0.5 / agent.speed
-            score = get_fuzzy_assignment(agent.health, dist, task.urgency)
-            heapq.heappush(heap, (-score, agent.id, task.id))
-    while heap and len(used_agents) < len(agents):
-        _, aid, tid = heapq.heappop(heap)
-        if aid not in used_agents and tid not in used_tasks:
-            result[aid] = tid
-            used_agents.add(aid)
-            used_tasks.add(tid)
-    return result
-
-# Perform initial assignment
-assign_tasks(current_mode)
+MAX_STEPS_PER_FRAME = 10  # Drop simulation time rather than spiral when solves are slow
+MAX_FPS = 60  # Frame rate cap, leaves the CPU to the solver (0: uncapped)
 
 # === Draw Battlefield Grid and Entities ===
+# Only the cells and entities inside the viewport are described; the renderer
+# repaints just the regions that changed since the last frame
 def draw():
-    screen.fill(WHITE)
     mx, my = pygame.mouse.get_pos()
-    gx, gy = mx // CELL_SIZE, my // CELL_SIZE
-
-    # Draw grid
-    for x in range(GRID_WIDTH):
-        for y in range(GRID_HEIGHT):
-            pygame.draw.rect(screen, BLACK, (x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE), 1)
-
-    max_urgency = max([t.urgency for t in tasks], default=0)
+    gx, gy = mx // CELL_SIZE + view_x, my // CELL_SIZE + view_y
+    ox, oy = view_x * CELL_SIZE, view_y * CELL_SIZE  # Screen offset of the viewport
+    window = (view_x, view_y, view_x + VIEW_COLS, view_y + VIEW_ROWS)
+    visible_tasks = [tasks.get(tid) for tid in sim.battle.task_index.window(*window)]
+    visible_agents = [agents.get(aid) for aid in sim.battle.agent_index.window(*window)]
+    renderer.begin((view_x, view_y))
+
+    max_urgency = tasks.column('urgency').max() if len(tasks) else 0
     blink_intensity = int((time.time() * 4) % 2) * 50
 
     # Draw tasks
-    for task in tasks:
+    for task in visible_tasks:
+        px, py = task.x * CELL_SIZE - ox, task.y * CELL_SIZE - oy
         color = RED
         if task.urgency >= max_urgency:
             color = (255, blink_intensity, blink_intensity)
-        pygame.draw.circle(screen, color, (task.x * CELL_SIZE + 25, task.y * CELL_SIZE + 25), 15)
-        screen.blit(font.render(f"T{task.id}", True, BLACK), (task.x * CELL_SIZE + 5, task.y * CELL_SIZE + 5))
-    
-    # Only show task tooltip if NO agent is on the same cell
-        if task.x == gx and task.y == gy and not any(a.x == task.x and a.y == task.y for a in agents):
-            screen.blit(font.render(f"Urgency: {round(task.urgency, 2)}", True, BLACK), (task.x * CELL_SIZE + 30, task.y * CELL_SIZE + 10))
+        renderer.circle(('task', task.id), color, (px + 25, py + 25), 15)
+        renderer.text(('task_label', task.id), f"T{task.id}", (px + 5, py + 5))
 
+        # Only show task tooltip if NO agent is on the same cell
+        if task.x == gx and task.y == gy and not sim.battle.agents[gx, gy]:
+            renderer.text('tooltip', f"Urgency: {round(task.urgency, 2)}", (px + 30, py + 10))
 
     # Draw agents
-    for agent in agents:
+    for agent in visible_agents:
+        px, py = agent.x * CELL_SIZE - ox, agent.y * CELL_SIZE - oy
         color = YELLOW if agent.id == selected_agent_id else GREEN
-        pygame.draw.circle(screen, color, (agent.x * CELL_SIZE + 25, agent.y * CELL_SIZE + 25), 15)
-        screen.blit(font.render(f"A{agent.id}", True, BLACK), (agent.x * CELL_SIZE + 5, agent.y * CELL_SIZE + 5))
+        renderer.circle(('agent', agent.id), color, (px + 25, py + 25), 15)
+        renderer.text(('agent_label', agent.id), f"A{agent.id}", (px + 5, py + 5))
         if agent.x == gx and agent.y == gy:
-            screen.blit(font.render(f"H:{agent.health} S:{int(agent.stamina)} Sp:{agent.speed}", True, BLACK), (agent.x * CELL_SIZE + 30, agent.y * CELL_SIZE + 10))
-
+            renderer.text('tooltip', f"H:{int(agent.health)} S:{int(agent.stamina)} Sp:{agent.speed:g}",
+                          (px + 30, py + 10))
 
     # Draw assignment lines and task progress
-    for aid, tid in assignments.items():
-        agent = next(a for a in agents if a.id == aid)
-        task = next((t for t in tasks if t.id == tid), None)
+    for agent in visible_agents:
+        task = tasks.get(assignments.get(agent.id))
         if task:
-            pygame.draw.line(screen, BLUE, (agent.x * CELL_SIZE + 25, agent.y * CELL_SIZE + 25), (task.x * CELL_SIZE + 25, task.y * CELL_SIZE + 25), 2)
-            progress = progress_timers.get(task.id, 0) / TASK_DURATION
-            pygame.draw.rect(screen, BLACK, (task.x * CELL_SIZE + 10, task.y * CELL_SIZE - 5, 30, 5))
-            pygame.draw.rect(screen, GREEN, (task.x * CELL_SIZE + 10, task.y * CELL_SIZE - 5, 30 * progress, 5))
+            tx, ty = task.x * CELL_SIZE - ox, task.y * CELL_SIZE - oy
+            renderer.line(('line', agent.id), BLUE, (agent.x * CELL_SIZE - ox + 25, agent.y * CELL_SIZE - oy + 25),
+                          (tx + 25, ty + 25), 2)
+            progress = task.progress / TASK_DURATION
+            renderer.rect(('bar', task.id), BLACK, (tx + 10, ty - 5, 30, 5))
+            renderer.rect(('bar_done', task.id), GREEN, (tx + 10, ty - 5, int(30 * progress), 5))
 
     # Display current mode
-    screen.blit(font.render(f"Mode: {current_mode.upper()} (F/P/G)", True, BLACK), (10, WINDOW_HEIGHT - 30))
-    pygame.display.flip()
+    renderer.text('mode', f"Mode: {sim.mode.upper()} (F/P/G/H/I)", (10, WINDOW_HEIGHT - 30))
+    return renderer.present()
 
 # === Show Efficiency Chart ===
-def show_charts():
-    agent_ids = list(assignments.keys())
-    fuzzy_scores, pso_scores, ga_scores, dist_list = [], [], [], []
-    for aid in agent_ids:
-        agent = next(a for a in agents if a.id == aid)
-        tid = assignments[aid]
-        task = next(t for t in tasks if t.id == tid)
-        dist = ((agent.x - task.x)**2 + (agent.y - task.y)**2)**0.5
-        dist_list.append(dist)
-        fuzzy_scores.append(get_fuzzy_assignment(agent.health, dist, task.urgency))
-        pso_scores.append(agent.health * 0.4 + task.urgency * 0.4 - dist * 0.2)
-        ga_scores.append(agent.health * 0.5 + task.urgency * 0.3 - dist * 0.2)
+def show_charts(agents, tasks, assignments):
+    import matplotlib.pyplot as plt
+    cost = CostMatrix(agents, tasks)
+    agent_index = {aid: i for i, aid in enumerate(cost.agent_ids)}
+    task_index = {tid: j for j, tid in enumerate(cost.task_ids)}
+    agent_ids = [aid for aid, tid in assignments.items() if tid in task_index]
+    rows = [agent_index[aid] for aid in agent_ids]
+    cols = [task_index[assignments[aid]] for aid in agent_ids]
+    dist_list = cost.euclidean[rows, cols]
+    fuzzy_scores = get_fuzzy_scores(cost.health[rows], dist_list, cost.urgency[cols])
+    pso_scores = cost.score(CHART_PSO_WEIGHTS, cost.euclidean)[rows, cols]
+    ga_scores = cost.score(GA_WEIGHTS, cost.euclidean)[rows, cols]
 
     x = list(range(1, len(agent_ids) + 1))
     width = 0.2
@@ -206,110 +112,133 @@ def show_charts():
     plt.show()
 
 # === Show Assignment History Chart ===
-def show_history_chart():
-    if not assignment_history:
+def show_history_chart(history):
+    import matplotlib.pyplot as plt
+    if not len(history):
         print("No assignment history to show yet.")
         return
-    timestamps = list(range(len(assignment_history)))
-    data = {agent.id: [] for agent in agents}
-    for snapshot in assignment_history:
-        for aid in data:
-            data[aid].append(snapshot.get(aid, None))
+    # Read back from the on-disk log; each agent is drawn from its change points
+    last_event = len(history) - 1
     plt.figure(figsize=(12, 6))
-    for aid, task_ids in data.items():
-        plt.plot(timestamps, task_ids, label=f"Agent {aid}", marker='o')
+    for aid, (events, task_ids) in agent_series(history.read()).items():
+        plt.step(np.append(events, last_event), np.append(task_ids, task_ids[-1]), where='post',
+                 label=f"Agent {aid}", marker='o')
     plt.title("Assignment History")
     plt.xlabel("Event")
     plt.ylabel("Task ID")
-    plt.xticks(timestamps)
+    if last_event < 50:
+        plt.xticks(range(last_event + 1))
     plt.legend()
     plt.grid(True)
     plt.show()
 
-# === Main Game Loop ===
-running = True
-last_move_time = time.time()
-
-while running:
-    draw()
-    now = time.time()
-
-    # Dynamically add new tasks if under limit
-    if now - last_task_add > TASK_ADD_INTERVAL and len(tasks) < TASK_LIMIT:
-        x, y = get_unique_position()
-        tid = max([t.id for t in tasks if isinstance(t.id, int)] + [0]) + 1
-        task = Task(tid, 'Dynamic', x, y, urgency=random.randint(5, 10))
-        tasks.append(task)
-        task_timers[task.id] = now
-        progress_timers[task.id] = 0
-        assign_tasks(current_mode)
-        last_task_add = now
-
-    # Trigger reassignment if tasks are left unassigned or reach high urgency
-    for task in tasks:
-        if task.id not in assignments.values():
-            task.urgency = min(10, task.urgency + 0.01)
-            if task.urgency >= 10:
-                assign_tasks(current_mode)
-
-    # Agent movement and task progress updates
-    if now - last_move_time >= 1:
-        for agent in agents:
-            tid = assignments.get(agent.id)
-            if tid:
-                task = next((t for t in tasks if t.id == tid), None)
-                if task:
-                    tx, ty = task.x, task.y
-                    if (agent.x, agent.y) != (tx, ty):
-                        dx = 1 if tx > agent.x else -1 if tx < agent.x else 0
-                        dy = 1 if ty > agent.y else -1 if ty < agent.y else 0
-                        agent.x += dx
-                        agent.y += dy
-                        agent.stamina = max(0, agent.stamina - 1)
-                    else:
-                        progress_timers[tid] = min(TASK_DURATION, progress_timers.get(tid, 0) + 1)
-                        if progress_timers[tid] >= TASK_DURATION:
-                            tasks[:] = [t for t in tasks if t.id != tid]
-                            progress_timers.pop(tid, None)
-                            task_timers.pop(tid, None)
-                            assign_tasks(current_mode)
-            else:
-                agent.stamina = min(100, agent.stamina + 0.1)
-        last_move_time = now
-
-    # Event handling
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        elif event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_f:
-                current_mode = 'fuzzy'
-                assign_tasks(current_mode)
-            elif event.key == pygame.K_p:
-                current_mode = 'pso'
-                assign_tasks(current_mode)
-            elif event.key == pygame.K_g:
-                current_mode = 'ga'
-                assign_tasks(current_mode)
-            elif event.key == pygame.K_c:
-                show_history_chart()
-            elif event.key == pygame.K_v:
-                show_charts()
-            elif event.key == pygame.K_q:
-                running = False
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            mx, my = pygame.mouse.get_pos()
-            gx, gy = mx // CELL_SIZE, my // CELL_SIZE
-            for agent in agents:
-                if agent.x == gx and agent.y == gy:
-                    selected_agent_id = agent.id
-                    break
-            else:
-                if selected_agent_id:
-                    agent = next((a for a in agents if a.id == selected_agent_id), None)
-                    if agent:
-                        agent.x, agent.y = gx, gy
-                        assign_tasks(current_mode)
-                    selected_agent_id = None
-
-pygame.quit()
\ No newline at end of file
+# pygame front end: renders the headless Simulation and feeds it user input.
+# The window, pygame and the simulation are only created when run as a script,
+# so the chart helpers can be imported without side effects.
+if __name__ == '__main__':
+    import pygame
+    from renderer import Renderer
+
+    parser = argparse.ArgumentParser(description="Run the battlefield simulation with a pygame window.")
+    parser.add_argument('--mode', choices=MODES, default='fuzzy')
+    parser.add_argument('--agents', type=int, default=3)
+    parser.add_argument('--tasks', type=int, default=3)
+    parser.add_argument('--width', type=int, default=GRID_WIDTH)
+    parser.add_argument('--height', type=int, default=GRID_HEIGHT)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    VIEW_COLS = min(args.width, MAX_VIEW_COLS)
+    VIEW_ROWS = min(args.height, MAX_VIEW_ROWS)
+    WINDOW_WIDTH = VIEW_COLS * CELL_SIZE
+    WINDOW_HEIGHT = VIEW_ROWS * CELL_SIZE
+
+    pygame.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    pygame.display.set_caption("Battlefield Assignment")
+    font = pygame.font.SysFont(None, 24)
+    renderer = Renderer(screen, font, CELL_SIZE, VIEW_COLS, VIEW_ROWS, WHITE, BLACK)
+    clock = pygame.time.Clock()
+
+    # === Initialization ===
+    # Solves run on a background thread so rendering never waits on PSO/GA
+    sim = Simulation(args.mode, args.agents, args.tasks, args.width, args.height, args.seed, log=True,
+                     solver=SolverService())
+    agents = sim.agents
+    tasks = sim.tasks
+    assignments = sim.assignments  # Current agent-task assignments
+    history = sim.history  # Assignment log, streamed to disk
+    selected_agent_id = None
+    view_x, view_y = 0, 0  # Top-left cell of the viewport
+
+    # === Main Game Loop ===
+    running = True
+    last_frame = time.perf_counter()
+    accumulator = 0.0
+
+    try:
+        while running:
+            clock.tick(MAX_FPS)
+            phases = PhaseTimer(sim.metrics)
+            sim.metrics.count('dirty_rects', draw())
+            phases.mark('draw')
+            now = time.perf_counter()
+            accumulator += now - last_frame
+            sim.metrics.observe('frame_seconds', now - last_frame)
+            last_frame = now
+
+            # Advance the simulation in fixed steps to catch up with real time
+            steps = 0
+            while accumulator >= TICK and steps < MAX_STEPS_PER_FRAME:
+                sim.step()
+                accumulator -= TICK
+                steps += 1
+            if steps == MAX_STEPS_PER_FRAME:
+                accumulator = 0.0
+            phases.skip()  # Simulation phases are timed inside step()
+
+            # Event handling
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    renderer.invalidate()
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_f:
+                        sim.assign_tasks('fuzzy')
+                    elif event.key == pygame.K_p:
+                        sim.assign_tasks('pso')
+                    elif event.key == pygame.K_g:
+                        sim.assign_tasks('ga')
+                    elif event.key == pygame.K_h:
+                        sim.assign_tasks('hungarian')
+                    elif event.key == pygame.K_i:
+                        sim.assign_tasks('incremental')
+                    elif event.key == pygame.K_c:
+                        show_history_chart(history)
+                    elif event.key == pygame.K_v:
+                        show_charts(agents, tasks, assignments)
+                    elif event.key == pygame.K_m:
+                        sim.update_gauges()
+                        plot_performance(sim.metrics)
+                    elif event.key == pygame.K_q:
+                        running = False
+                    elif event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                        step = 1 if event.key == pygame.K_RIGHT else -1
+                        view_x = min(max(0, view_x + step), args.width - VIEW_COLS)
+                    elif event.key in (pygame.K_UP, pygame.K_DOWN):
+                        step = 1 if event.key == pygame.K_DOWN else -1
+                        view_y = min(max(0, view_y + step), args.height - VIEW_ROWS)
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    mx, my = pygame.mouse.get_pos()
+                    gx, gy = mx // CELL_SIZE + view_x, my // CELL_SIZE + view_y
+                    clicked = sim.battle.agent_index.at(gx, gy)
+                    if clicked:
+                        selected_agent_id = clicked[0]
+                    elif selected_agent_id:
+                        sim.move_agent(selected_agent_id, gx, gy)
+                        selected_agent_id = None
+            phases.mark('events')
+    finally:
+        # Also on errors / Ctrl-C, so the temporary history log is removed
+        sim.close()
+        pygame.quit()
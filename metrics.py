@@ -1,9 +1,199 @@
-import matplotlib.pyplot as plt
+import csv
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
 
-def plot_performance(task_efficiency, utilization, response_time):
-    labels = ['Task Eff.', 'Utilization', 'Resp. Time']
-    values = [task_efficiency, utilization, response_time]
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implicit
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+# Counters, per-phase timers, gauges and latency histograms, keyed by name
+# plus optional labels (e.g. mode='pso'). Updates are plain dict operations so
+# they can sit on the per-tick hot path. There is one writer (the simulation
+# thread); exporters read a snapshot of each dict, which is safe under the GIL.
+class Metrics:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counters = {}
+        self.gauges = {}
+        self.timers = {}  # phase -> [total seconds, calls]
+        self.histograms = {}  # key -> [bucket counts..., +Inf count, sum]
+        self.started = time.time()
+
+    # === Recording ===
+    def count(self, name, n=1, **labels):
+        key = _key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + n
+
+    def gauge(self, name, value, **labels):
+        self.gauges[_key(name, labels)] = value
+
+    def add_time(self, phase, seconds):
+        entry = self.timers.get(phase)
+        if entry is None:
+            entry = self.timers[phase] = [0.0, 0]
+        entry[0] += seconds
+        entry[1] += 1
+
+    @contextmanager
+    def timer(self, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(phase, time.perf_counter() - start)
+
+    def observe(self, name, seconds, **labels):
+        key = _key(name, labels)
+        hist = self.histograms.get(key)
+        if hist is None:
+            hist = self.histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        hist[bisect_left(self.buckets, seconds)] += 1
+        hist[-1] += seconds
+
+    # === Reading ===
+    def phase_totals(self):
+        return {phase: total for phase, (total, _) in list(self.timers.items())}
+
+    def histogram_summary(self, name, **labels):
+        hist = self.histograms.get(_key(name, labels))
+        if hist is None:
+            return {'count': 0, 'sum': 0.0, 'mean': 0.0}
+        count = sum(hist[:-1])
+        return {'count': count, 'sum': hist[-1], 'mean': hist[-1] / count if count else 0.0}
+
+    def rows(self):
+        # Flat (kind, name, labels, field, value) rows shared by every exporter
+        rows = [('counter', name, labels, 'value', value) for (name, labels), value in list(self.counters.items())]
+        rows += [('gauge', name, labels, 'value', value) for (name, labels), value in list(self.gauges.items())]
+        for phase, (total, calls) in list(self.timers.items()):
+            labels = (('phase', phase),)
+            rows += [('timer', 'phase_seconds', labels, 'sum', total), ('timer', 'phase_seconds', labels, 'count', calls)]
+        for (name, labels), hist in list(self.histograms.items()):
+            hist = list(hist)
+            cumulative = 0
+            for bound, n in zip(list(self.buckets) + ['+Inf'], hist[:-1]):
+                cumulative += n
+                rows.append(('histogram', name, labels, f'le={bound}', cumulative))
+            rows += [('histogram', name, labels, 'sum', hist[-1]), ('histogram', name, labels, 'count', cumulative)]
+        return rows
+
+    # === Exporters ===
+    def to_dict(self):
+        return [{'kind': kind, 'name': name, 'labels': dict(labels), 'field': field, 'value': value}
+                for kind, name, labels, field, value in self.rows()]
+
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump({'uptime_s': time.time() - self.started, 'metrics': self.to_dict()}, f, indent=2)
+
+    def write_csv(self, path):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['kind', 'name', 'labels', 'field', 'value'])
+            for kind, name, labels, field, value in self.rows():
+                writer.writerow([kind, name, ';'.join(f"{k}={v}" for k, v in labels), field, value])
+
+    def prometheus_text(self, prefix='battlefield_'):
+        lines, typed = [], set()
+        for kind, name, labels, field, value in self.rows():
+            metric = prefix + name
+            prom_type = {'counter': 'counter', 'gauge': 'gauge'}.get(kind, 'summary' if kind == 'timer' else kind)
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} {prom_type}")
+                typed.add(metric)
+            label_pairs = list(labels)
+            if field.startswith('le='):
+                label_pairs.append(('le', field[3:]))
+                metric_name = metric + '_bucket'
+            elif field in ('sum', 'count'):
+                metric_name = f"{metric}_{field}"
+            else:
+                metric_name = metric
+            label_text = ','.join(f'{k}="{v}"' for k, v in label_pairs)
+            lines.append(f"{metric_name}{{{label_text}}} {value}" if label_text else f"{metric_name} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port=9100, host='127.0.0.1'):
+        # Local Prometheus scrape endpoint on a daemon thread; call shutdown() on the result to stop
+        # (http.server is imported here so `import simulation` doesn't pay for it)
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+# Splits one pass of a loop into consecutive phases: each mark() charges the
+# time since the previous mark to the named phase.
+class PhaseTimer:
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.last = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.metrics.add_time(phase, now - self.last)
+        self.last = now
+
+    # Start the next phase now without charging the time since the last mark
+    # (e.g. time already accounted for elsewhere)
+    def skip(self):
+        self.last = time.perf_counter()
+
+
+# Opt-in cProfile hook: profiles the block, dumps stats to `path` (if given)
+# and prints the `top` entries by cumulative time.
+@contextmanager
+def profile(path=None, top=15):
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if path:
+            profiler.dump_stats(path)
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(top)
+
+
+def plot_performance(metrics):
+    import matplotlib.pyplot as plt  # Loaded on first plot; it takes ~1 s to import
+
+    # Measured values only: gauges refreshed by the simulation, plus the phase timers
+    gauges = {name: value for (name, labels), value in metrics.gauges.items() if not labels}
+    labels = ['Task Eff. (%)', 'Utilization (%)', 'Resp. Time (ms)']
+    values = [gauges.get('task_efficiency', 0), gauges.get('utilization', 0), gauges.get('response_time_ms', 0)]
+    phases = metrics.phase_totals()
+
+    plt.figure(figsize=(12, 5))
+    plt.subplot(1, 2, 1)
     plt.bar(labels, values)
-    plt.ylim(0, 100)
     plt.title("Live Metrics")
+    plt.subplot(1, 2, 2)
+    plt.bar(list(phases), list(phases.values()), color='orange')
+    plt.title("Time per Phase")
+    plt.ylabel("Seconds")
+    plt.tight_layout()
     plt.show()
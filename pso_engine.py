@@ -1,85 +1,114 @@
-from pyswarm import pso
+import time
 import numpy as np
 from itertools import permutations
-import sys
-import os
-
-# Suppress pyswarm output
-class DummyOutput:
-    def write(self, x): pass
-    def flush(self): pass
-
-def get_pso_assignment(agents, tasks):
+from cost_matrix import CostMatrix
+
+# Particle swarm over random keys. Each particle is a point in [0, 1]^L,
+# L = max(agents, tasks); ranking its coordinates gives a permutation and
+# agent i takes task perm[i] (indices >= num_tasks leave the agent idle).
+# The whole swarm is decoded and scored as one matrix per iteration.
+# `deadline` and `initial` work as in the GA: iterate while the next step
+# still fits before the deadline (or until stalled) instead of maxiter,
+# starting from a seeded permutation.
+def get_pso_assignment(agents, tasks, cost=None, swarmsize=30, maxiter=50,
+                       omega=0.5, phip=0.5, phig=0.5, patience=10, tol=1e-9, seed=None,
+                       deadline=None, initial=None):
     num_agents = len(agents)
     num_tasks = len(tasks)
 
     if num_tasks == 0:
-        return {}
+        return {agent.id: None for agent in agents}
+
+    cost = cost if cost is not None else CostMatrix(agents, tasks)
+    score = cost.pso_score
 
     # Use brute force for small inputs
     if num_agents <= 7 and num_tasks <= num_agents:
-        return brute_force_assignment(agents, tasks)
+        return brute_force_assignment(agents, tasks, score, cost.stats)
+
+    rng = np.random.default_rng(seed)
+    size = max(num_agents, num_tasks)
+    padded = np.zeros((size, size))
+    padded[:num_agents, :num_tasks] = score
+
+    x = rng.random((swarmsize, size))
+    v = rng.uniform(-1, 1, (swarmsize, size))
+    if initial is not None:
+        x[0] = permutation_keys(initial)
+    started = time.perf_counter()
+    p, fp = x.copy(), fitness(padded, x)
+    g, fg = p[np.argmax(fp)].copy(), fp.max()
+    stall = 0
+    evaluations = swarmsize
+    last = time.perf_counter() - started  # Duration of the previous step
+
+    iteration = 0
+    while iteration < maxiter or deadline is not None:
+        started = time.perf_counter()
+        # Twice the last duration: steps vary, and the result still has to be decoded
+        if deadline is not None and started + 2 * last >= deadline:
+            break
+        iteration += 1
+        x, v = swarm_step(padded, x, v, p, fp, g, rng, omega, phip, phig)
+        evaluations += swarmsize
+        last = time.perf_counter() - started
+
+        # Stop once the swarm's best stops improving
+        if fp.max() > fg + tol:
+            g, fg = p[np.argmax(fp)].copy(), fp.max()
+            stall = 0
+        else:
+            stall += 1
+            if stall >= patience:
+                break
 
-    prev_stdout = sys.stdout
-    sys.stdout = DummyOutput()  # Suppress pyswarm internal print
+    cost.stats['fitness_evaluations'] = evaluations
+    result = {}
+    for i, task_index in enumerate(np.argsort(g)[:num_agents]):
+        result[agents[i].id] = tasks[int(task_index)].id if task_index < num_tasks else None
 
-    def fitness(x):
-        total_score = 0
-        assigned_tasks = set()
-        for i, task_index in enumerate(x.astype(int)):
-            if task_index >= num_tasks:
-                continue
-            if task_index in assigned_tasks:
-                continue
-            assigned_tasks.add(task_index)
-            agent = agents[i]
-            task = tasks[task_index]
+    return result
 
-            dist = abs(agent.x - task.x) + abs(agent.y - task.y)
-            time_to_reach = dist / max(agent.speed, 0.1)
+def fitness(padded, positions):
+    return padded[np.arange(padded.shape[0]), np.argsort(positions, axis=1)].sum(axis=1)
 
-            # Task urgency rises over time; minimize time to start
-            score = agent.health * 0.3 + task.urgency * 0.4 - time_to_reach * 0.3
-            total_score += score
-        return -total_score  # minimize
 
-    lb = np.zeros(len(agents))
-    ub = np.full(len(agents), num_tasks)  # index range up to num_tasks (invalids ignored)
+# Random keys that decode to the given permutation: argsort(keys) == perm
+def permutation_keys(perm):
+    keys = np.empty(len(perm))
+    keys[perm] = np.arange(len(perm)) / len(perm)
+    return keys
 
-    xopt, _ = pso(fitness, lb, ub, swarmsize=30, maxiter=50, debug=False)
 
-    sys.stdout = prev_stdout  # Restore normal output
+# One velocity/position update of the whole swarm. Personal bests (p, fp) are
+# updated in place; the caller tracks the global best g.
+def swarm_step(padded, x, v, p, fp, g, rng, omega=0.5, phip=0.5, phig=0.5):
+    rp = rng.random(x.shape)
+    rg = rng.random(x.shape)
+    v = omega * v + phip * rp * (p - x) + phig * rg * (g - x)
+    x = np.clip(x + v, 0, 1)
 
-    result = {}
-    used_tasks = set()
-    for i, task_index in enumerate(xopt.astype(int)):
-        if task_index < num_tasks and task_index not in used_tasks:
-            result[agents[i].id] = tasks[task_index].id
-            used_tasks.add(task_index)
-        else:
-            result[agents[i].id] = None
+    fx = fitness(padded, x)
+    improved = fx > fp
+    p[improved], fp[improved] = x[improved], fx[improved]
+    return x, v
 
-    return result
 
-def brute_force_assignment(agents, tasks):
+def brute_force_assignment(agents, tasks, score=None, stats=None):
     num_agents = len(agents)
     num_tasks = len(tasks)
-    best_score = float('-inf')
+    if score is None:
+        score = CostMatrix(agents, tasks).pso_score
     best_assignment = {}
 
-    for perm in permutations(range(num_tasks), min(num_agents, num_tasks)):
-        score = 0
-        assignment = {}
-        for i, task_index in enumerate(perm):
-            agent = agents[i]
-            task = tasks[task_index]
-            dist = abs(agent.x - task.x) + abs(agent.y - task.y)
-            time_to_reach = dist / max(agent.speed, 0.1)
-            score += agent.health * 0.3 + task.urgency * 0.4 - time_to_reach * 0.3
-            assignment[agent.id] = task.id
-        if score > best_score:
-            best_score = score
-            best_assignment = assignment
+    k = min(num_agents, num_tasks)
+    if k > 0:
+        # Score every permutation at once and keep the first best one
+        perms = np.array(list(permutations(range(num_tasks), k)))
+        best = perms[np.argmax(score[np.arange(k), perms].sum(axis=1))]
+        if stats is not None:
+            stats['fitness_evaluations'] = len(perms)
+        best_assignment = {agents[i].id: tasks[task_index].id for i, task_index in enumerate(best)}
 
     for agent in agents:
         if agent.id not in best_assignment:
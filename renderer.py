@@ -0,0 +1,116 @@
+import pygame
+
+GLYPH_CACHE_SIZE = 4096  # Rendered text surfaces kept before the cache is dropped
+MAX_DIRTY_RECTS = 64  # Beyond this many changed regions one full redraw is cheaper
+
+
+# Retained-mode pygame renderer. Each frame the caller describes the scene as
+# keyed primitives (circle, text, line, rect) between begin() and present().
+# present() diffs the scene against the previous frame and only repaints the
+# regions whose primitives appeared, changed or disappeared: the static grid
+# is restored from a pre-drawn background, every primitive overlapping the
+# region is redrawn in scene order, and only those rectangles are pushed to
+# the display. An unchanged frame costs no drawing at all.
+# Regions are composited on an offscreen frame and primitives are drawn
+# unclipped there (a clipped line rasterizes differently), so a partial
+# update is pixel-identical to a full redraw.
+class Renderer:
+    def __init__(self, screen, font, cell_size, cols, rows, background=(255, 255, 255), grid=(0, 0, 0)):
+        self.screen = screen
+        self.font = font
+        self.bounds = screen.get_rect()
+        self.background = pygame.Surface(self.bounds.size).convert()
+        self.background.fill(background)
+        for x in range(cols):
+            for y in range(rows):
+                pygame.draw.rect(self.background, grid, (x * cell_size, y * cell_size, cell_size, cell_size), 1)
+        self.frame = self.background.copy()  # Composited scene, copied to the screen region by region
+        self.glyphs = {}  # text -> rendered surface
+        self.scene = {}  # key -> (primitive, bounding rect) of the frame being built
+        self.previous = {}  # ... of the frame on screen
+        self.view = None
+        self.full = True  # Next present() repaints the whole window
+
+    # Forget what is on screen, e.g. after the window was uncovered
+    def invalidate(self):
+        self.full = True
+
+    def glyph(self, text):
+        surface = self.glyphs.get(text)
+        if surface is None:
+            if len(self.glyphs) >= GLYPH_CACHE_SIZE:
+                self.glyphs.clear()
+            surface = self.glyphs[text] = self.font.render(text, True, (0, 0, 0))
+        return surface
+
+    # === Scene Description ===
+    # `view` identifies the viewport; panning moves everything, so it forces a full redraw
+    def begin(self, view=None):
+        if view != self.view:
+            self.view = view
+            self.full = True
+        self.scene = {}
+
+    def circle(self, key, color, center, radius):
+        x, y = center
+        self.scene[key] = (('circle', color, center, radius), pygame.Rect(x - radius, y - radius, 2 * radius + 1,
+                                                                          2 * radius + 1))
+
+    def text(self, key, text, pos):
+        self.scene[key] = (('text', text, pos), pygame.Rect(pos, self.glyph(text).get_size()))
+
+    def line(self, key, color, start, end, width=1):
+        (x0, y0), (x1, y1) = start, end
+        rect = pygame.Rect(min(x0, x1), min(y0, y1), abs(x1 - x0) + 1, abs(y1 - y0) + 1)
+        self.scene[key] = (('line', color, start, end, width), rect.inflate(width + 2, width + 2))
+
+    def rect(self, key, color, rect):
+        self.scene[key] = (('rect', color, tuple(rect)), pygame.Rect(rect))
+
+    def _draw(self, primitive):
+        kind = primitive[0]
+        if kind == 'circle':
+            pygame.draw.circle(self.frame, *primitive[1:])
+        elif kind == 'text':
+            self.frame.blit(self.glyph(primitive[1]), primitive[2])
+        elif kind == 'line':
+            pygame.draw.line(self.frame, *primitive[1:])
+        else:
+            pygame.draw.rect(self.frame, *primitive[1:])
+
+    # === Output ===
+    # Draws the scene built since begin(); returns the number of rectangles updated
+    def present(self):
+        scene, previous = self.scene, self.previous
+        self.previous = scene
+        dirty = []
+        if not self.full:
+            for key, (primitive, rect) in scene.items():
+                old = previous.get(key)
+                if old is None:
+                    dirty.append(rect)
+                elif old[0] != primitive:
+                    dirty += [old[1], rect]
+            dirty += [rect for key, (_, rect) in previous.items() if key not in scene]
+            dirty = [rect for rect in (r.clip(self.bounds) for r in dirty) if rect.width and rect.height]
+        if self.full or len(dirty) > MAX_DIRTY_RECTS:
+            self.full = False
+            self.frame.blit(self.background, (0, 0))
+            for primitive, _ in scene.values():
+                self._draw(primitive)
+            self.screen.blit(self.frame, (0, 0))
+            pygame.display.flip()
+            return 1
+        if not dirty:
+            return 0
+
+        primitives = list(scene.values())
+        rects = [rect for _, rect in primitives]
+        for region in dirty:
+            # Pixels drawn outside the region are stale but never shown
+            self.frame.blit(self.background, region, region)
+            for i in region.collidelistall(rects):
+                self._draw(primitives[i][0])
+            self.screen.blit(self.frame, region, region)
+        pygame.display.update(dirty)
+        return len(dirty)
@@ -0,0 +1,255 @@
+import argparse
+import csv
+import hashlib
+import json
+import time
+from dataclasses import dataclass, asdict, fields
+import numpy as np
+from agent import Agent
+from task import Task
+
+# === Snapshot / Event Log Format ===
+# MAGIC, a little-endian u4 header length, the JSON header (sorted keys), then
+# the agent, task and event record arrays back to back. Everything in the file
+# is derived from the simulation state, never from wall-clock time, so the
+# same run always writes the same bytes.
+MAGIC = b'BFSCN\x01'
+AGENT = np.dtype([('id', '<i8'), ('x', '<i8'), ('y', '<i8'), ('health', '<f8'), ('stamina', '<f8'),
+                  ('speed', '<f8'), ('role', 'S16')])
+TASK = np.dtype([('id', '<i8'), ('x', '<i8'), ('y', '<i8'), ('urgency', '<f8'), ('type', 'S16')])
+# kind SPAWN: task `id` of `label` type appears at (x, y) with urgency `value` during tick `tick`
+# kind MOVE: the user drops agent `id` on (x, y) after tick `tick`
+# kind MODE: the user switches to engine `label` after tick `tick` (forcing a solve)
+EVENT = np.dtype([('tick', '<u8'), ('kind', 'u1'), ('id', '<i8'), ('x', '<i8'), ('y', '<i8'),
+                  ('value', '<f8'), ('label', 'S16')])
+SPAWN, MOVE, MODE = 0, 1, 2
+
+
+# Seeded description of a run; a JSON file with any of these fields
+@dataclass
+class Scenario:
+    name: str = 'scenario'
+    seed: int = 0
+    agents: int = 3
+    tasks: int = 3
+    width: int = 10
+    height: int = 10
+    ticks: int = 10000
+    mode: str = 'fuzzy'
+    candidates: int = None
+
+    @classmethod
+    def from_json(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        known = {field.name for field in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in known})
+
+
+# Collects the initial world and every spawn / user input of a running
+# Simulation (pass it as `recorder=`), then writes them with save().
+class ScenarioRecorder:
+    def __init__(self, scenario=None):
+        self.scenario = scenario
+        self.agents = self.tasks = None
+        self.events = []
+        self.header = {}
+
+    def start(self, sim):
+        agents, tasks = sim.agents, sim.tasks
+        self.agents = np.zeros(len(agents), dtype=AGENT)
+        for field in ('x', 'y', 'health', 'stamina', 'speed'):
+            self.agents[field] = agents.column(field)
+        self.agents['id'] = agents.ids
+        self.agents['role'] = [a.role.encode() for a in agents]
+        self.tasks = np.zeros(len(tasks), dtype=TASK)
+        for field in ('x', 'y', 'urgency'):
+            self.tasks[field] = tasks.column(field)
+        self.tasks['id'] = tasks.ids
+        self.tasks['type'] = [t.type.encode() for t in tasks]
+        self.header = {'seed': sim.seed, 'mode': sim.mode, 'candidates': sim.candidates,
+                       'width': sim.battle.width, 'height': sim.battle.height}
+
+    def spawn(self, tick, task):
+        self.events.append((tick, SPAWN, task.id, task.x, task.y, task.urgency, task.type.encode()))
+
+    def move(self, tick, aid, x, y):
+        self.events.append((tick, MOVE, aid, x, y, 0.0, b''))
+
+    def mode(self, tick, mode):
+        self.events.append((tick, MODE, 0, 0, 0, 0.0, mode.encode()))
+
+    def save(self, path, ticks):
+        events = np.array(self.events, dtype=EVENT)
+        header = dict(self.header, ticks=ticks, agents=len(self.agents), tasks=len(self.tasks), events=len(events),
+                      scenario=asdict(self.scenario) if self.scenario is not None else None)
+        blob = json.dumps(header, sort_keys=True, separators=(',', ':')).encode()
+        with open(path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(np.array([len(blob)], dtype='<u4').tobytes())
+            f.write(blob)
+            for records in (self.agents, self.tasks, events):
+                f.write(records.tobytes())
+
+
+def read_snapshot(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a scenario snapshot")
+    offset = len(MAGIC) + 4
+    size = int(np.frombuffer(data, dtype='<u4', count=1, offset=len(MAGIC))[0])
+    header = json.loads(data[offset:offset + size])
+    offset += size
+    records = []
+    for dtype, count in ((AGENT, header['agents']), (TASK, header['tasks']), (EVENT, header['events'])):
+        records.append(np.frombuffer(data, dtype=dtype, count=count, offset=offset))
+        offset += dtype.itemsize * count
+    return header, *records
+
+
+# === Recording ===
+def record(scenario, path, **options):
+    from simulation import Simulation
+
+    recorder = ScenarioRecorder(scenario)
+    sim = Simulation(scenario.mode, scenario.agents, scenario.tasks, scenario.width, scenario.height,
+                     scenario.seed, candidates=scenario.candidates, recorder=recorder, **options)
+    try:
+        sim.run(scenario.ticks)
+    finally:
+        recorder.save(path, sim.ticks)
+        sim.close()
+    return sim
+
+
+# === Replay ===
+# Re-runs a snapshot headlessly with inline solves: same initial world, same
+# spawns and user input at the same ticks, any engine. Returns one row per
+# solve and a summary. Everything but the latencies is deterministic; the
+# `digest` (SHA-256 over every solve's tick and assignment) is identical on
+# every run of the same snapshot and engine, so it pins down behaviour while
+# bisecting a performance regression. (Island and --solve-budget solves
+# depend on timing and are not reproducible.) Every engine the replay uses is
+# warmed up first, so lazy imports don't show up as solve latency.
+def replay(path, mode=None, candidates=None):
+    from simulation import Simulation
+    from cost_matrix import CostMatrix
+    from anytime import assignment_score
+
+    header, agents, tasks, events = read_snapshot(path)
+    world = ([Agent(int(r['id']), r['role'].decode(), int(r['x']), int(r['y']), health=float(r['health']),
+                    stamina=float(r['stamina']), speed=float(r['speed'])) for r in agents],
+             [Task(int(r['id']), r['type'].decode(), int(r['x']), int(r['y']), urgency=float(r['urgency']))
+              for r in tasks])
+    spawns, inputs = {}, {}
+    for e in events:
+        if e['kind'] == SPAWN:
+            task = Task(int(e['id']), e['label'].decode(), int(e['x']), int(e['y']), urgency=float(e['value']))
+            spawns.setdefault(int(e['tick']), []).append(task)
+        else:
+            inputs.setdefault(int(e['tick']), []).append(e)
+
+    candidates = candidates if candidates is not None else header['candidates']
+    modes = {mode} if mode is not None else {header['mode']} | {e['label'].decode() for e in events
+                                                                 if e['kind'] == MODE}
+    warm_up(modes, candidates)
+    sim = Simulation(mode or header['mode'], grid_width=header['width'], grid_height=header['height'],
+                     seed=header['seed'], candidates=candidates, world=world, spawns=spawns)
+    rows, digest = [], hashlib.sha256()
+
+    def observe():
+        assignment = sorted((aid, tid) for aid, tid in sim.assignments.items() if tid is not None)
+        score = assignment_score(CostMatrix(sim.agents, sim.tasks), sim.assignments)
+        digest.update(json.dumps([sim.ticks, assignment]).encode())
+        rows.append({'solve': sim.solves, 'tick': sim.ticks, 'mode': sim.mode, 'tasks': len(sim.tasks),
+                     'assigned': len(assignment), 'score': round(score, 6),
+                     'latency_ms': 1000 * sim.last_solve_seconds})
+
+    start = time.perf_counter()
+    observe()
+    try:
+        for tick in range(header['ticks']):
+            for e in inputs.get(tick, ()):
+                if e['kind'] == MOVE:
+                    sim.move_agent(int(e['id']), int(e['x']), int(e['y']))
+                elif e['kind'] == MODE:
+                    sim.assign_tasks(e['label'].decode() if mode is None else mode)
+                    observe()
+            solves = sim.solves
+            sim.step()
+            if sim.solves != solves:
+                observe()
+    finally:
+        sim.close()
+
+    latencies = np.array([row['latency_ms'] for row in rows])
+    summary = {'snapshot': path, 'mode': sim.mode, 'ticks': sim.ticks, 'solves': sim.solves,
+               'completed_tasks': sim.completed_tasks, 'skipped_spawns': sim.skipped_spawns,
+               'total_score': round(sum(row['score'] for row in rows), 6), 'digest': digest.hexdigest(),
+               'latency_ms_mean': float(latencies.mean()), 'latency_ms_p50': float(np.percentile(latencies, 50)),
+               'latency_ms_p95': float(np.percentile(latencies, 95)), 'latency_ms_max': float(latencies.max()),
+               'wall_seconds': time.perf_counter() - start}
+    return rows, summary
+
+
+# Solves a 2 x 2 problem with each engine (incremental repairs with the
+# Hungarian method), densely or over candidates as the replay will
+def warm_up(modes, candidates=None):
+    from simulation import get_engine
+    from cost_matrix import CostMatrix
+
+    agents = [Agent(i, 'Warmup', i, 0) for i in range(2)]
+    tasks = [Task(i, 'Warmup', 0, i) for i in range(2)]
+    for mode in modes:
+        engine = get_engine('hungarian' if mode == 'incremental' else mode)
+        engine(agents, tasks, CostMatrix(agents, tasks, 1 if candidates else None))
+
+
+def write_report(rows, summary, path):
+    with open(f"{path}.csv", 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(f"{path}.json", 'w') as f:
+        json.dump({'summary': summary, 'solves': rows}, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record seeded scenarios and replay them deterministically.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    rec = commands.add_parser('record', help="run a seeded scenario and save its snapshot / event log")
+    rec.add_argument('scenario', nargs='?', default=None, help="scenario JSON (defaults plus the flags below)")
+    rec.add_argument('output', help="snapshot file to write")
+    for field in fields(Scenario):
+        rec.add_argument(f'--{field.name}', type=str if field.name in ('name', 'mode') else int, default=None)
+    rep = commands.add_parser('replay', help="replay a snapshot headlessly and report per-solve latency and score")
+    rep.add_argument('snapshot')
+    rep.add_argument('--mode', default=None, help="engine to replay with (default: as recorded)")
+    rep.add_argument('--candidates', type=int, default=None, metavar='K')
+    rep.add_argument('--report', default=None, metavar='PATH', help="write PATH.csv and PATH.json")
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        scenario = Scenario.from_json(args.scenario) if args.scenario else Scenario()
+        for field in fields(Scenario):
+            if getattr(args, field.name) is not None:
+                setattr(scenario, field.name, getattr(args, field.name))
+        sim = record(scenario, args.output)
+        print(f"Recorded {scenario.name}: {sim.ticks} ticks, {sim.solves} solves, "
+              f"{sim.completed_tasks} completed tasks -> {args.output}")
+        return
+
+    rows, summary = replay(args.snapshot, args.mode, args.candidates)
+    if args.report:
+        write_report(rows, summary, args.report)
+    print(f"Mode: {summary['mode']}, ticks: {summary['ticks']}, solves: {summary['solves']}, "
+          f"completed tasks: {summary['completed_tasks']}, skipped spawns: {summary['skipped_spawns']}")
+    print(f"Solve latency: mean {summary['latency_ms_mean']:.3f} ms, p50 {summary['latency_ms_p50']:.3f} ms, "
+          f"p95 {summary['latency_ms_p95']:.3f} ms, max {summary['latency_ms_max']:.3f} ms")
+    print(f"Total score: {summary['total_score']:.3f}")
+    print(f"Digest: {summary['digest']}")
+
+
+if __name__ == '__main__':
+    main()
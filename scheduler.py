@@ -0,0 +1,46 @@
+# Coalesces reassignment triggers into at most one solve per poll. Normal
+# triggers wait until `min_interval` has passed since the last solve; urgent
+# ones are solved at the next poll. Repeats of an already pending trigger
+# are dropped.
+class ReassignmentScheduler:
+    def __init__(self, min_interval=0.5):
+        self.min_interval = min_interval
+        self.last_solve = None
+        self._pending = {}  # event -> urgent flag, in arrival order
+        self.triggers = 0  # Every request()
+        self.dropped = 0  # Requests identical to one already pending
+        self.coalesced = 0  # Distinct events folded into another event's solve
+        self.solves = 0
+
+    def request(self, event, urgent=False):
+        self.triggers += 1
+        if event in self._pending:
+            self.dropped += 1
+        self._pending[event] = self._pending.get(event, False) or urgent
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def due(self, now):
+        if not self._pending:
+            return False
+        if any(self._pending.values()) or self.last_solve is None:
+            return True
+        return now - self.last_solve >= self.min_interval
+
+    # Returns the events to solve for, or None if no solve is due yet. The
+    # caller runs the solve and reports it with solved().
+    def poll(self, now):
+        return list(self._pending) if self.due(now) else None
+
+    # Any solve covers every pending trigger
+    def solved(self, now):
+        self.coalesced += max(0, len(self._pending) - 1)
+        self._pending.clear()
+        self.last_solve = now
+        self.solves += 1
+
+    def stats(self):
+        return {'triggers': self.triggers, 'solves': self.solves, 'dropped': self.dropped,
+                'coalesced': self.coalesced, 'pending': self.pending}
@@ -0,0 +1,459 @@
+import argparse
+import importlib
+import random
+import time
+from agent import Agent
+from task import Task
+import numpy as np
+from battlefield import Battlefield
+from world_state import AgentStore, TaskStore
+from cost_matrix import CostMatrix
+from incremental import IncrementalAssigner, assignment_stability
+from scheduler import ReassignmentScheduler
+from history_log import AssignmentLog
+from metrics import Metrics, PhaseTimer, profile
+from solver_service import SolverService, WorldSnapshot
+from world_update import IDLE, STALE, advance_agents, accumulate_progress
+
+# === Settings ===
+GRID_WIDTH = 10
+GRID_HEIGHT = 10
+TICK = 1 / 60  # Fixed simulation step (virtual seconds)
+URGENCY_GROWTH = 0.01  # Urgency added per tick to unassigned tasks
+MOVE_INTERVAL = 1  # Agents move / work once per virtual second
+TASK_DURATION = 15
+TASK_LIMIT = 10
+TASK_ADD_INTERVAL = 3  # New task frequency (seconds)
+ASSIGNMENT_LOG_INTERVAL = 7  # Log assignment details every 7 seconds
+MIN_RESOLVE_INTERVAL = 0.5  # Minimum virtual seconds between non-urgent re-solves
+
+# Assignment engines by mode, as (module, function) imported on first use so
+# a run only loads the engines it needs. Each takes (agents, tasks, cost) and
+# returns {agent_id: task_id}.
+ENGINES = {
+    'fuzzy': ('fuzzy_engine', 'get_fuzzy_task_assignment'),
+    'pso': ('pso_engine', 'get_pso_assignment'),
+    'ga': ('ga_engine', 'get_ga_assignment'),
+    'hungarian': ('hungarian_engine', 'get_hungarian_assignment'),
+    'island': ('island_model', 'get_island_assignment'),
+}
+# 'incremental' keeps its solution between events and repairs it locally
+MODES = tuple(ENGINES) + ('incremental',)
+# Stochastic engines, given a per-solve seed so runs are reproducible
+SEEDED_ENGINES = {'pso', 'ga', 'island'}
+
+
+def get_engine(mode):
+    module, name = ENGINES.get(mode, ENGINES['fuzzy'])
+    return getattr(importlib.import_module(module), name)
+
+
+# One solve, optionally deadline-bounded: with `budget` (seconds) it goes
+# through anytime.solve_anytime. Returns (assignment, gap); the optimality gap
+# is only known for budgeted solves.
+def run_engine(mode, agents, tasks, cost, budget=None, seed=None):
+    options = {'seed': seed} if seed is not None and mode in SEEDED_ENGINES else {}
+    if budget is None:
+        return get_engine(mode)(agents, tasks, cost, **options), None
+    from anytime import solve_anytime
+    solved = solve_anytime(mode, agents, tasks, cost, budget=budget, **options)
+    return solved.assignment, solved.gap
+
+
+# Headless simulation core. All timing comes from a virtual clock advanced in
+# fixed steps by step(), so it runs as fast as the solvers allow and has no
+# dependency on pygame. Every random draw comes from one seeded generator
+# (a seed is picked and kept in `self.seed` if none is given).
+#
+# For replays (see scenario.py) the initial `world` can be given as
+# ([Agent], [Task]) and dynamic spawns as `spawns`, a dict of tick -> [Task];
+# a `recorder` is told about spawns and user input as they happen.
+class Simulation:
+    def __init__(self, mode='fuzzy', num_agents=3, num_tasks=3, grid_width=GRID_WIDTH,
+                 grid_height=GRID_HEIGHT, seed=None, log=False, solver=None, candidates=None, history_path=None,
+                 metrics=None, solve_budget=None, world=None, spawns=None, recorder=None):
+        self.mode = mode
+        self.candidates = candidates  # Score only each agent's k nearest tasks (None: all)
+        self.solve_budget = solve_budget  # Seconds per solve (None: engines run to completion)
+        self.log = log
+        self.solver = solver  # Optional SolverService for non-blocking solves
+        self.snapshot_version = 0
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng = random.Random(self.seed)
+        self.spawns = spawns
+        self.skipped_spawns = 0  # Scripted spawns whose id or cell was already taken
+        self.recorder = recorder
+        self.battle = Battlefield(grid_width, grid_height)
+        self.clock = 0.0
+        self.ticks = 0
+
+        self.agents = AgentStore()
+        self.tasks = TaskStore()
+        self.assignments = {}  # Current agent-task assignments
+        self.history = AssignmentLog(history_path)  # Assignments over time, streamed to disk
+        self.task_timers = {}  # Task creation timestamps
+        self._targets = None  # Task row per agent row for the movement kernel (rebuilt after changes)
+        self.last_task_add = 0.0
+        self.last_move_time = 0.0
+        self.last_assignment_log_time = None
+        self.completed_tasks = 0
+        self.solves = 0
+        self.last_solve_seconds = 0.0
+        self.solve_seconds = 0.0  # Total solver latency
+        self.stability_total = 0.0  # Sum of assignment_stability() over solves
+        self.assigner = None  # IncrementalAssigner in 'incremental' mode
+        self.scheduler = ReassignmentScheduler(MIN_RESOLVE_INTERVAL)
+        self.metrics = metrics if metrics is not None else Metrics()
+        # Everything from here on can fail; don't leak the history file if it does
+        try:
+            if solve_budget is not None:
+                # Measure the one-shot engines here rather than overrunning the first budgeted solves
+                from anytime import calibrate
+                calibrate()
+
+            if world is None:
+                for i in range(num_agents):
+                    x, y = self.get_unique_position()
+                    agent = self.agents.add(Agent(i+1, 'Attacker', x, y, health=self.rng.randint(50, 100),
+                                                  stamina=self.rng.randint(50, 100), speed=self.rng.randint(1, 5)))
+                    self.battle.place(agent)
+                for i in range(num_tasks):
+                    self.add_task(i+1, 'Task')
+            else:
+                agents, tasks = world
+                for agent in agents:
+                    self.battle.place(self.agents.add(agent))
+                for task in tasks:
+                    self.place_task(task)
+            if recorder is not None:
+                recorder.start(self)
+
+            # Perform initial assignment
+            self.assign_tasks()
+        except BaseException:
+            self.close()
+            raise
+
+    # === Utility Function: Get Unique Grid Position ===
+    # O(1) draw from the battlefield's free cells; raises ValueError when full
+    def get_unique_position(self):
+        return self.battle.allocate(self.rng)
+
+    def add_task(self, tid, type):
+        x, y = self.get_unique_position()
+        return self.place_task(Task(tid, type, x, y, urgency=self.rng.randint(5, 10)))
+
+    def place_task(self, task):
+        task = self.tasks.add(task)
+        self.metrics.count('tasks_spawned')
+        self.battle.place(task)
+        self.task_timers[task.id] = self.clock
+        return task
+
+    # === Assignment Logic ===
+    # `events` lists the (kind, id) changes that triggered the solve; the
+    # incremental mode uses them to repair instead of re-solving from scratch.
+    def assign_tasks(self, mode=None, events=None):
+        if mode is not None and self.recorder is not None:
+            self.recorder.mode(self.ticks, mode)
+        if mode is not None and mode != self.mode:
+            self.mode = mode
+            events = None
+        self.scheduler.solved(self.clock)
+
+        # Hand the solve to the background service; the current assignment
+        # stays in use until its result arrives (incremental repair is cheap
+        # and stateful, so it always runs inline)
+        if self.solver is not None and self.mode != 'incremental':
+            self.assigner = None
+            self.snapshot_version += 1
+            self.solver.submit(WorldSnapshot(self.snapshot_version, self.mode, self.agents.copy(), self.tasks.copy(),
+                                             self.candidates, self.solve_budget, self._engine_seed()))
+            return
+
+        start = time.perf_counter()
+        stats, gap = {}, None
+        if self.mode == 'incremental':
+            result = self._incremental_assignment(events)
+            stats['repair_moves'] = self.assigner.last_moves
+        else:
+            self.assigner = None
+            cost = CostMatrix(self.agents, self.tasks, self.candidates)
+            result, gap = run_engine(self.mode, self.agents, self.tasks, cost, self.solve_budget, self._engine_seed())
+            stats = cost.stats
+        self._apply_assignment(result, time.perf_counter() - start, stats, gap)
+
+    # Seed for one solve of a stochastic engine, derived from the run seed
+    def _engine_seed(self):
+        return [self.seed, self.scheduler.solves]
+
+    # Metrics are labelled with the engine that produced the result (`mode`,
+    # default the current one): a background solve may finish after a switch
+    def _apply_assignment(self, result, seconds, stats=None, gap=None, mode=None):
+        mode = mode or self.mode
+        previous = self.assignments.copy()
+        self.assignments.clear()
+        # Results from an older snapshot may name tasks completed since
+        self.assignments.update({aid: tid for aid, tid in result.items()
+                                 if aid in self.agents and (tid is None or tid in self.tasks)})
+        self.history.record(self.clock, self.assignments)
+        self._targets = None
+        self.solves += 1
+        self.last_solve_seconds = seconds
+        self.solve_seconds += seconds
+        self.stability_total += assignment_stability(previous, self.assignments)
+        self.metrics.count('solves', mode=mode)
+        self.metrics.observe('solve_seconds', seconds, mode=mode)
+        for name, value in (stats or {}).items():
+            self.metrics.count(name, value, mode=mode)
+        if gap is not None:
+            self.metrics.gauge('solution_gap', gap, mode=mode)
+
+        # Log assignment scores periodically
+        if self.log and (self.last_assignment_log_time is None
+                         or self.clock - self.last_assignment_log_time >= ASSIGNMENT_LOG_INTERVAL):
+            from fuzzy_engine import get_fuzzy_assignment
+            print("\n=== Assignment Results ===")
+            cost = CostMatrix(self.agents, self.tasks)
+            agent_index = {aid: i for i, aid in enumerate(cost.agent_ids)}
+            task_index = {tid: j for j, tid in enumerate(cost.task_ids)}
+            for aid, tid in self.assignments.items():
+                if aid in agent_index and tid in task_index:
+                    i, j = agent_index[aid], task_index[tid]
+                    dist = cost.euclidean[i, j]
+                    score = get_fuzzy_assignment(cost.health[i], dist, cost.urgency[j])
+                    print(f"✅ Agent {aid} assigned to Task {tid} with Score {score:.2f} and Distance {dist:.2f}")
+            self.last_assignment_log_time = self.clock
+
+    def _incremental_assignment(self, events):
+        if self.assigner is None or events is None:
+            self.assigner = IncrementalAssigner(self.agents, self.tasks)
+            return self.assigner.repair()
+        for kind, eid in events:
+            if kind == 'task_added' and eid in self.tasks:
+                self.assigner.add_task(eid)
+            elif kind == 'task_removed' and eid in self.assigner.col:
+                self.assigner.remove_task(eid)
+            elif kind == 'task_changed' and eid in self.tasks:
+                self.assigner.task_changed(eid)
+            elif kind == 'agent_moved':
+                self.assigner.agent_changed(eid)
+        return self.assigner.repair()
+
+    # Drop an agent on a new cell (user input) and re-solve right away
+    def move_agent(self, aid, x, y):
+        agent = self.agents.get(aid)
+        if agent is None:
+            return
+        if self.recorder is not None:
+            self.recorder.move(self.ticks, aid, x, y)
+        self.battle.move(agent, x, y)
+        self.request_reassignment(('agent_moved', aid), urgent=True)
+
+    # Queue a reassignment; urgent ones (idle agents, user input) skip the
+    # minimum re-solve interval
+    def request_reassignment(self, event, urgent=False):
+        self.scheduler.request(event, urgent)
+
+    def poll_solver(self):
+        if self.solver is None:
+            return
+        done = self.solver.poll()
+        if done is not None:
+            _, mode, result, seconds, stats, gap = done
+            self._apply_assignment(result, seconds, stats, gap, mode)
+
+    def close(self):
+        if self.solver is not None:
+            self.solver.shutdown()
+        self.history.close()
+
+    # Derived gauges (percentages and means) for exporters and plots
+    def update_gauges(self):
+        counters = {name: value for (name, labels), value in self.metrics.counters.items() if not labels}
+        spawned = counters.get('tasks_spawned', 0)
+        agent_steps = counters.get('agent_steps', 0)
+        self.metrics.gauge('task_efficiency', 100 * self.completed_tasks / spawned if spawned else 0.0)
+        self.metrics.gauge('utilization', 100 * counters.get('busy_agent_steps', 0) / agent_steps if agent_steps else 0.0)
+        self.metrics.gauge('response_time_ms', 1000 * self.solve_seconds / self.solves if self.solves else 0.0)
+        self.metrics.gauge('assignment_stability', self.stability_total / self.solves if self.solves else 1.0)
+        self.metrics.gauge('open_tasks', len(self.tasks))
+        self.metrics.gauge('ticks', self.ticks)
+        self.metrics.gauge('virtual_seconds', self.clock)
+        for name, value in self.scheduler.stats().items():
+            self.metrics.gauge(f'scheduler_{name}', value)
+        if self.solver is not None:
+            for name, value in self.solver.stats().items():
+                self.metrics.gauge(f'solver_{name}', value)
+
+    # === Simulation Step ===
+    def step(self):
+        phases = PhaseTimer(self.metrics)
+        self.ticks += 1
+        self.clock = self.ticks * TICK
+        now = self.clock
+        self.poll_solver()
+        phases.mark('poll_solver')
+
+        # Dynamically add new tasks if under limit (or replay the recorded spawns)
+        if self.spawns is not None:
+            for task in self.spawns.get(self.ticks, ()):
+                if task.id in self.tasks or self.battle.tasks[task.x, task.y]:
+                    self.skipped_spawns += 1
+                    continue
+                self.place_task(task)
+                self.request_reassignment(('task_added', task.id))
+        elif now - self.last_task_add > TASK_ADD_INTERVAL and len(self.tasks) < TASK_LIMIT:
+            tid = max([t for t in self.tasks.ids if isinstance(t, int)] + [0]) + 1
+            task = self.add_task(tid, 'Dynamic')
+            if self.recorder is not None:
+                self.recorder.spawn(self.ticks, task)
+            self.request_reassignment(('task_added', tid))
+            self.last_task_add = now
+        phases.mark('spawn')
+
+        # Trigger reassignment if tasks are left unassigned or reach high urgency
+        targets = self._target_rows()
+        unassigned = np.bincount(targets[targets >= 0], minlength=len(self.tasks)) == 0
+        urgency = self.tasks.column('urgency')
+        urgency[unassigned] = np.minimum(urgency[unassigned] + URGENCY_GROWTH, 10)
+        rows = np.flatnonzero(unassigned)
+        if self.assigner is not None:
+            for j in rows.tolist():
+                self.assigner.task_changed(self.tasks.ids[j], repair=False)
+        for j in rows[urgency[rows] >= 10].tolist():
+            self.request_reassignment(('task_changed', self.tasks.ids[j]))
+        phases.mark('urgency')
+
+        # Agent movement and task progress updates
+        if now - self.last_move_time >= MOVE_INTERVAL:
+            self.move_agents()
+            self.last_move_time = now
+        phases.mark('movement')
+
+        # One solve per tick at most, covering every trigger since the last one
+        events = self.scheduler.poll(now)
+        if events is not None:
+            self.assign_tasks(events=events)
+        phases.mark('assignment')
+
+    # Task row each agent works towards, as an array aligned with the agent store
+    def _target_rows(self):
+        if self._targets is None:
+            targets = np.full(len(self.agents), IDLE)
+            for aid, tid in self.assignments.items():
+                if tid is not None and aid in self.agents:
+                    targets[self.agents.index(aid)] = self.tasks.index(tid) if tid in self.tasks else STALE
+            self._targets = targets
+        return self._targets
+
+    # One movement/work step for all agents as array operations; every task
+    # completed in the step is removed and re-solved for in one batch
+    def move_agents(self):
+        agents, tasks = self.agents, self.tasks
+        targets = self._target_rows()
+        x, y = agents.column('x'), agents.column('y')
+        old_x, old_y = x.copy(), y.copy()
+        moved, arrived = advance_agents(x, y, agents.column('speed'), agents.column('stamina'),
+                                        tasks.column('x'), tasks.column('y'), targets)
+        self.metrics.count('agent_steps', len(agents))
+        self.metrics.count('busy_agent_steps', int((targets >= 0).sum()))  # Agents with a live task
+
+        rows = np.flatnonzero(moved)
+        if len(rows):
+            ids = np.asarray(agents.ids, dtype=object)[rows].tolist()
+            self.battle.move_agents(ids, old_x[rows], old_y[rows], x[rows], y[rows])
+            self.metrics.count('agent_moves', len(rows))
+            if self.assigner is not None:
+                for aid in ids:
+                    self.assigner.agent_changed(aid, repair=False)
+
+        done = accumulate_progress(tasks.column('progress'), targets[arrived], TASK_DURATION)
+        if len(done):
+            for tid in [tasks.ids[j] for j in done.tolist()]:
+                self.battle.remove(tasks.get(tid))
+                tasks.remove(tid)
+                self.task_timers.pop(tid, None)
+                self.request_reassignment(('task_removed', tid), urgent=True)
+            self._targets = None
+            self.completed_tasks += len(done)
+            self.metrics.count('tasks_completed', len(done))
+
+    def run(self, ticks):
+        for _ in range(ticks):
+            self.step()
+
+
+# === Headless CLI ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the battlefield simulation without a display.")
+    parser.add_argument('--mode', choices=MODES, default='fuzzy')
+    parser.add_argument('--ticks', type=int, default=10000)
+    parser.add_argument('--agents', type=int, default=3)
+    parser.add_argument('--tasks', type=int, default=3)
+    parser.add_argument('--width', type=int, default=GRID_WIDTH)
+    parser.add_argument('--height', type=int, default=GRID_HEIGHT)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--verbose', action='store_true', help="print periodic assignment logs")
+    parser.add_argument('--async-solver', action='store_true', help="solve on a background thread")
+    parser.add_argument('--candidates', type=int, default=None, metavar='K',
+                        help="only consider each agent's K nearest tasks (fuzzy and hungarian modes)")
+    parser.add_argument('--solve-budget', type=float, default=None, metavar='MS',
+                        help="deadline per solve in milliseconds; returns the best assignment found in time")
+    parser.add_argument('--history', default=None, metavar='PATH', help="keep the binary assignment log at PATH")
+    parser.add_argument('--record', default=None, metavar='PATH',
+                        help="save the initial world and every spawn as a scenario snapshot (see scenario.py)")
+    parser.add_argument('--metrics', default=None, metavar='PATH', help="write metrics to PATH.json and PATH.csv")
+    parser.add_argument('--metrics-port', type=int, default=None, metavar='PORT',
+                        help="serve Prometheus metrics on localhost:PORT while running")
+    parser.add_argument('--profile', nargs='?', const='', default=None, metavar='PATH',
+                        help="profile the run with cProfile (stats dumped to PATH if given)")
+    args = parser.parse_args(argv)
+
+    solver = SolverService() if args.async_solver else None
+    recorder = None
+    if args.record:
+        from scenario import ScenarioRecorder
+        recorder = ScenarioRecorder()
+    sim = Simulation(args.mode, args.agents, args.tasks, args.width, args.height, args.seed, args.verbose, solver,
+                     args.candidates, args.history,
+                     solve_budget=args.solve_budget / 1000 if args.solve_budget is not None else None,
+                     recorder=recorder)
+    server = sim.metrics.serve(args.metrics_port) if args.metrics_port else None
+    start = time.perf_counter()
+    try:
+        if args.profile is not None:
+            with profile(args.profile or None):
+                sim.run(args.ticks)
+        else:
+            sim.run(args.ticks)
+        elapsed = time.perf_counter() - start
+    finally:
+        # Also on errors / Ctrl-C, so the temporary history log is removed
+        sim.close()
+        if server is not None:
+            server.shutdown()
+    if recorder is not None:
+        recorder.save(args.record, sim.ticks)
+    sim.update_gauges()
+    if args.metrics:
+        sim.metrics.write_json(f"{args.metrics}.json")
+        sim.metrics.write_csv(f"{args.metrics}.csv")
+
+    print(f"Mode: {sim.mode}")
+    print(f"Ticks: {sim.ticks} ({sim.clock:.1f} virtual s) in {elapsed:.2f} s "
+          f"({sim.ticks / max(elapsed, 1e-9):.0f} ticks/s)")
+    print(f"Solves: {sim.solves}, completed tasks: {sim.completed_tasks}, open tasks: {len(sim.tasks)}")
+    if sim.solves:
+        stats = sim.scheduler.stats()
+        print(f"Triggers: {stats['triggers']}, dropped: {stats['dropped']}, coalesced: {stats['coalesced']}")
+        print(f"Mean solve latency: {1000 * sim.solve_seconds / sim.solves:.3f} ms, "
+              f"mean assignment stability: {sim.stability_total / sim.solves:.3f}")
+    if solver is not None:
+        print(f"Solver service: {solver.stats()}")
+    phases = sim.metrics.phase_totals()
+    print("Time per phase: " + ", ".join(f"{phase} {1000 * seconds:.1f} ms" for phase, seconds in phases.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass
+from cost_matrix import CostMatrix
+from world_state import AgentStore, TaskStore
+
+
+# Frozen copy of everything a solver needs; the live world can keep changing
+# while it is being solved.
+@dataclass(frozen=True)
+class WorldSnapshot:
+    version: int
+    mode: str
+    agents: AgentStore
+    tasks: TaskStore
+    candidates: int = None  # k nearest tasks per agent for sparse engines
+    budget: float = None  # Seconds the solve may take (None: run to completion)
+    seed: object = None  # Seed for stochastic engines
+
+
+def solve_snapshot(snapshot):
+    from simulation import run_engine
+
+    start = time.perf_counter()
+    cost = CostMatrix(snapshot.agents, snapshot.tasks, snapshot.candidates)
+    result, gap = run_engine(snapshot.mode, snapshot.agents, snapshot.tasks, cost, snapshot.budget, snapshot.seed)
+    return snapshot.version, snapshot.mode, result, time.perf_counter() - start, cost.stats, gap
+
+
+# Runs solves off the render loop. Only the newest snapshot matters: a queued
+# solve is cancelled when a newer snapshot arrives, and a finished result is
+# discarded if a newer one has already been delivered. Callers keep using
+# their last assignment until poll() hands over a fresher one.
+class SolverService:
+    def __init__(self, workers=1, use_processes=False):
+        pool = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        self._executor = pool(max_workers=workers)
+        self._in_flight = []  # futures, oldest first
+        self._latest_version = -1  # newest result handed to the caller
+        self.submitted = 0
+        self.cancelled = 0
+        self.discarded = 0
+        self.completed = 0
+        self.failed = 0
+
+    def submit(self, snapshot):
+        # Drop queued solves for older snapshots
+        for future in self._in_flight:
+            if future.cancel():
+                self.cancelled += 1
+        self._in_flight = [f for f in self._in_flight if not f.cancelled()]
+        future = self._executor.submit(solve_snapshot, snapshot)
+        self._in_flight.append(future)
+        self.submitted += 1
+        return future
+
+    @property
+    def busy(self):
+        return bool(self._in_flight)
+
+    # Returns (version, mode, assignment, solve_seconds, engine_stats, gap) for
+    # the newest finished solve, or None if nothing new is ready. `mode` is the
+    # engine the snapshot was solved with, which may differ from the current one.
+    def poll(self):
+        # One scan: a future finishing mid-poll stays in flight until the next call
+        done, pending = [], []
+        for future in self._in_flight:
+            (done if future.done() else pending).append(future)
+        if not done:
+            return None
+        self._in_flight = pending
+        newest = None
+        for future in done:
+            try:
+                version, mode, result, seconds, stats, gap = future.result()
+            except Exception as e:
+                self.failed += 1
+                print(f"Solver failed: {type(e).__name__}: {e}")
+                continue
+            if version <= self._latest_version:
+                self.discarded += 1
+                continue
+            if newest is not None:
+                self.discarded += 1
+            self._latest_version = version
+            newest = (version, mode, result, seconds, stats, gap)
+        if newest is not None:
+            self.completed += 1
+        return newest
+
+    def shutdown(self, wait=False):
+        for future in self._in_flight:
+            future.cancel()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self):
+        return {'submitted': self.submitted, 'completed': self.completed,
+                'cancelled': self.cancelled, 'discarded': self.discarded, 'failed': self.failed, 'in_flight': len(self._in_flight)}
@@ -0,0 +1,207 @@
+import numpy as np
+
+
+# === Bucket Grid Index ===
+# Entities hashed into square buckets of `bucket_size` cells. Point, radius
+# and k-nearest queries only visit the buckets around the query cell.
+class GridIndex:
+    def __init__(self, width, height, bucket_size=8):
+        self.width = width
+        self.height = height
+        self.bucket_size = bucket_size
+        self._buckets = {}  # (bx, by) -> set of ids
+        self._positions = {}  # id -> (x, y)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, id):
+        return id in self._positions
+
+    def _bucket(self, x, y):
+        return x // self.bucket_size, y // self.bucket_size
+
+    def insert(self, id, x, y):
+        if id in self._positions:
+            self.remove(id)
+        self._positions[id] = (x, y)
+        self._buckets.setdefault(self._bucket(x, y), set()).add(id)
+
+    def remove(self, id):
+        x, y = self._positions.pop(id)
+        key = self._bucket(x, y)
+        bucket = self._buckets[key]
+        bucket.discard(id)
+        if not bucket:
+            del self._buckets[key]
+
+    def move(self, id, x, y):
+        old = self._positions.get(id)
+        if old is not None and self._bucket(*old) == self._bucket(x, y):
+            self._positions[id] = (x, y)
+        else:
+            self.insert(id, x, y)
+
+    # Batched move of existing ids from (old_x, old_y) to (x, y) arrays; only
+    # ids that cross into another bucket touch the bucket sets
+    def move_many(self, ids, old_x, old_y, x, y):
+        self._positions.update(zip(ids, zip(x.tolist(), y.tolist())))
+        size = self.bucket_size
+        obx, oby, nbx, nby = old_x // size, old_y // size, x // size, y // size
+        changed = np.flatnonzero((obx != nbx) | (oby != nby))
+        buckets = self._buckets
+        for i, ox, oy, nx, ny in zip(changed.tolist(), obx[changed].tolist(), oby[changed].tolist(),
+                                     nbx[changed].tolist(), nby[changed].tolist()):
+            id = ids[i]
+            bucket = buckets[ox, oy]
+            bucket.discard(id)
+            if not bucket:
+                del buckets[ox, oy]
+            buckets.setdefault((nx, ny), set()).add(id)
+
+    def position(self, id):
+        return self._positions[id]
+
+    def at(self, x, y):
+        return [id for id in self._buckets.get(self._bucket(x, y), ()) if self._positions[id] == (x, y)]
+
+    def radius(self, x, y, r, metric='manhattan'):
+        bx0, by0 = self._bucket(max(0, x - r), max(0, y - r))
+        bx1, by1 = self._bucket(x + r, y + r)
+        found = []
+        for bx in range(bx0, bx1 + 1):
+            for by in range(by0, by1 + 1):
+                for id in self._buckets.get((bx, by), ()):
+                    px, py = self._positions[id]
+                    if _distance(px - x, py - y, metric) <= r:
+                        found.append(id)
+        return found
+
+    # Ids inside the rectangle [x0, x1) x [y0, y1), e.g. a render viewport
+    def window(self, x0, y0, x1, y1):
+        bx0, by0 = self._bucket(max(0, x0), max(0, y0))
+        bx1, by1 = self._bucket(max(0, x1 - 1), max(0, y1 - 1))
+        found = []
+        for bx in range(bx0, bx1 + 1):
+            for by in range(by0, by1 + 1):
+                for id in self._buckets.get((bx, by), ()):
+                    px, py = self._positions[id]
+                    if x0 <= px < x1 and y0 <= py < y1:
+                        found.append(id)
+        return found
+
+    def nearest(self, x, y, k=1, metric='manhattan'):
+        # Search rings of buckets outwards until no unvisited bucket can hold
+        # anything closer than the current k-th best
+        cx, cy = self._bucket(x, y)
+        max_ring = max(self.width, self.height) // self.bucket_size + 1
+        best = []
+        for ring in range(max_ring + 1):
+            for bx in range(cx - ring, cx + ring + 1):
+                for by in range(cy - ring, cy + ring + 1):
+                    if max(abs(bx - cx), abs(by - cy)) != ring:
+                        continue
+                    for id in self._buckets.get((bx, by), ()):
+                        px, py = self._positions[id]
+                        best.append((_distance(px - x, py - y, metric), id))
+            if len(best) >= k:
+                best.sort(key=lambda item: item[0])
+                del best[k:]
+                # Cells in the next ring are at least this far away (Chebyshev)
+                if best[-1][0] <= ring * self.bucket_size:
+                    break
+        best.sort(key=lambda item: item[0])
+        return [id for _, id in best[:k]]
+
+
+def _distance(dx, dy, metric):
+    if metric == 'manhattan':
+        return abs(dx) + abs(dy)
+    return (dx * dx + dy * dy) ** 0.5
+
+
+# === Free Cell Pool ===
+# O(1) random allocation of unoccupied cells. A virtual array of all cell
+# numbers is shuffled lazily (Fisher-Yates with a sparse swap map), so
+# memory grows with the number of cells touched, not with the grid size.
+class FreeCellPool:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.free = width * height  # cells [0, free) of the virtual array are free
+        self._value = {}  # virtual slot -> cell, where it differs from the slot
+        self._slot = {}  # cell -> virtual slot, where it differs from the cell
+
+    def _get(self, slot):
+        return self._value.get(slot, slot)
+
+    def _put(self, slot, cell):
+        if slot == cell:
+            self._value.pop(slot, None)
+            self._slot.pop(cell, None)
+        else:
+            self._value[slot] = cell
+            self._slot[cell] = slot
+
+    def is_free(self, x, y):
+        return self._slot.get(y * self.width + x, y * self.width + x) < self.free
+
+    # A random free cell, left in the pool
+    def sample(self, rng):
+        if self.free == 0:
+            raise ValueError("No free cells left on the battlefield")
+        cell = self._get(rng.randrange(self.free))
+        return cell % self.width, cell // self.width
+
+    def cells(self):
+        for slot in range(self.free):
+            cell = self._get(slot)
+            yield cell % self.width, cell // self.width
+
+    def _take_slot(self, slot):
+        last = self.free - 1
+        cell, moved = self._get(slot), self._get(last)
+        self._put(slot, moved)
+        self._put(last, cell)
+        self.free = last
+        return cell
+
+    def allocate(self, rng):
+        if self.free == 0:
+            raise ValueError("No free cells left on the battlefield")
+        cell = self._take_slot(rng.randrange(self.free))
+        return cell % self.width, cell // self.width
+
+    def reserve(self, x, y):
+        cell = y * self.width + x
+        slot = self._slot.get(cell, cell)
+        if slot >= self.free:
+            return False
+        self._take_slot(slot)
+        return True
+
+    def release(self, x, y):
+        cell = y * self.width + x
+        slot = self._slot.get(cell, cell)
+        if slot < self.free:
+            return
+        # Swap the cell into the first used slot and grow the free range
+        first = self.free
+        other = self._get(first)
+        self._put(slot, other)
+        self._put(first, cell)
+        self.free += 1
+
+
+# === Batched k-Nearest Candidates ===
+# For each agent position, the indices of its k nearest tasks (Manhattan),
+# as flat (rows, cols) arrays suitable for a sparse cost matrix.
+def k_nearest(agent_pos, task_pos, k):
+    from scipy.spatial import cKDTree  # Deferred: scipy.spatial takes ~0.3 s to import
+    n, m = len(agent_pos), len(task_pos)
+    k = min(k, m)
+    if n == 0 or k == 0:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    _, cols = cKDTree(task_pos).query(agent_pos, k=k, p=1)
+    cols = np.asarray(cols).reshape(n, k)
+    return np.repeat(np.arange(n), k), cols.ravel()
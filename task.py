@@ -6,4 +6,5 @@ class Task:
         self.y = y
         self.urgency = urgency
         self.assigned = False
+        self.progress = 0  # Seconds worked on so far
     
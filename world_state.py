@@ -0,0 +1,163 @@
+import numpy as np
+
+
+# === Entity Views ===
+# Lightweight handles into a store row. Numeric attributes live in the store's
+# NumPy columns, so `agent.x += 1` writes straight into the array.
+def _column_property(field):
+    def get(self):
+        return self._store._arrays[field][self._i].item()
+
+    def set(self, value):
+        self._store._arrays[field][self._i] = value
+
+    return property(get, set)
+
+
+def _object_property(field):
+    def get(self):
+        return self._store._objects[field][self._i]
+
+    def set(self, value):
+        self._store._objects[field][self._i] = value
+
+    return property(get, set)
+
+
+class EntityView:
+    __slots__ = ('_store', '_i', 'id')
+
+    def __init__(self, store, i, id):
+        self._store = store
+        self._i = i
+        self.id = id
+
+    def __repr__(self):
+        return f"{type(self).__name__}(id={self.id!r})"
+
+
+class AgentView(EntityView):
+    __slots__ = ()
+
+
+class TaskView(EntityView):
+    __slots__ = ()
+
+
+# === Struct-of-Arrays Store ===
+# Entities are kept in contiguous NumPy columns with an id -> row map.
+# Removal swaps the last row into the freed slot, so rows stay packed.
+class EntityStore:
+    columns = {}  # numeric field -> dtype
+    objects = ()  # fields kept as plain Python values
+    view_class = EntityView
+
+    def __init__(self, capacity=16):
+        self._size = 0
+        self._capacity = capacity
+        self._arrays = {f: np.zeros(capacity, dtype=dtype) for f, dtype in self.columns.items()}
+        self._objects = {f: [] for f in self.objects}
+        self._ids = []
+        self._views = []
+        self._index = {}
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return iter(self._views)
+
+    def __getitem__(self, i):
+        return self._views[i]
+
+    def __contains__(self, id):
+        return id in self._index
+
+    @property
+    def ids(self):
+        return self._ids
+
+    def column(self, field):
+        return self._arrays[field][:self._size]
+
+    def index(self, id):
+        return self._index[id]
+
+    def get(self, id, default=None):
+        i = self._index.get(id)
+        return default if i is None else self._views[i]
+
+    # Independent copy of the current rows, e.g. for a solver snapshot
+    def copy(self):
+        clone = type(self)(capacity=max(self._size, 1))
+        for f in self.columns:
+            clone._arrays[f][:self._size] = self.column(f)
+        clone._objects = {f: list(values) for f, values in self._objects.items()}
+        clone._ids = list(self._ids)
+        clone._index = dict(self._index)
+        clone._views = [self.view_class(clone, i, id) for i, id in enumerate(self._ids)]
+        clone._size = self._size
+        return clone
+
+    def add(self, entity):
+        if entity.id in self._index:
+            raise ValueError(f"Duplicate entity id: {entity.id!r}")
+        i = self._size
+        if i == self._capacity:
+            self._grow()
+        for f in self.columns:
+            self._arrays[f][i] = getattr(entity, f)
+        for f in self.objects:
+            self._objects[f].append(getattr(entity, f))
+        view = self.view_class(self, i, entity.id)
+        self._ids.append(entity.id)
+        self._views.append(view)
+        self._index[entity.id] = i
+        self._size += 1
+        return view
+
+    def remove(self, id):
+        i = self._index.pop(id)
+        self._views[i]._store = None  # detach the removed view
+        last = self._size - 1
+        if i != last:
+            for arr in self._arrays.values():
+                arr[i] = arr[last]
+            for values in self._objects.values():
+                values[i] = values[last]
+            moved = self._views[last]
+            moved._i = i
+            self._views[i] = moved
+            self._ids[i] = moved.id
+            self._index[moved.id] = i
+        for values in self._objects.values():
+            values.pop()
+        self._views.pop()
+        self._ids.pop()
+        self._size = last
+
+    def _grow(self):
+        self._capacity = max(16, 2 * self._capacity)
+        for f, arr in self._arrays.items():
+            grown = np.zeros(self._capacity, dtype=arr.dtype)
+            grown[:len(arr)] = arr
+            self._arrays[f] = grown
+
+
+class AgentStore(EntityStore):
+    columns = {'x': np.int64, 'y': np.int64, 'health': np.float64, 'stamina': np.float64, 'speed': np.float64}
+    objects = ('role', 'state', 'task')
+    view_class = AgentView
+
+
+class TaskStore(EntityStore):
+    columns = {'x': np.int64, 'y': np.int64, 'urgency': np.float64, 'progress': np.float64}
+    objects = ('type', 'assigned')
+    view_class = TaskView
+
+
+for _store in (AgentStore, TaskStore):
+    for _field in _store.columns:
+        setattr(_store.view_class, _field, _column_property(_field))
+    for _field in _store.objects:
+        setattr(_store.view_class, _field, _object_property(_field))
@@ -0,0 +1,42 @@
+import numpy as np
+
+# Target codes in the per-agent target array (otherwise a task row)
+IDLE = -1  # No task assigned: the agent rests and regains stamina
+STALE = -2  # Assigned task no longer exists (awaiting the next solve): the agent waits
+
+
+# === Movement Kernel ===
+# One movement step for every agent at once. `x`, `y` and `stamina` are the
+# agent store columns and are updated in place; `targets` holds each agent's
+# task row (or IDLE / STALE). Agents close in on their task by up to `speed`
+# cells per axis, paying 1 stamina per step; idle agents regain `regen`.
+# Returns the masks of agents that moved and of agents standing on their task.
+def advance_agents(x, y, speed, stamina, task_x, task_y, targets, regen=0.1, max_stamina=100):
+    busy = targets >= 0
+    rows = np.flatnonzero(busy)
+    step = np.maximum(np.floor(speed[rows]), 1)
+    dx = np.clip(task_x[targets[rows]] - x[rows], -step, step).astype(x.dtype)
+    dy = np.clip(task_y[targets[rows]] - y[rows], -step, step).astype(y.dtype)
+    moving = (dx != 0) | (dy != 0)
+
+    x[rows] += dx
+    y[rows] += dy
+    movers = rows[moving]
+    stamina[movers] = np.maximum(stamina[movers] - 1, 0)
+    idle = targets == IDLE
+    stamina[idle] = np.minimum(stamina[idle] + regen, max_stamina)
+
+    moved = np.zeros(len(targets), dtype=bool)
+    moved[movers] = True
+    arrived = np.zeros(len(targets), dtype=bool)
+    arrived[rows[~moving]] = True
+    return moved, arrived
+
+
+# Adds one unit of work to each task row in `rows` (the tasks of agents that
+# have arrived) and returns the rows that reached `duration`
+def accumulate_progress(progress, rows, duration):
+    np.add.at(progress, rows, 1)
+    np.minimum(progress, duration, out=progress)
+    rows = np.unique(rows)
+    return rows[progress[rows] >= duration]